@@ -27,8 +27,29 @@ SyslogIdentifier=streamlit_app
 WantedBy=multi-user.target
 "
 
+# Scheduled fetching, independent of the UI
+FETCH_SERVICE_CONTENT="
+[Unit]
+Description=Events Feed Fetch Daemon
+After=network.target
+
+[Service]
+User=root
+WorkingDirectory=/srv/events_feed
+ExecStart=venv/bin/python src/daemon.py
+Restart=always
+RestartSec=30
+StandardOutput=syslog
+StandardError=syslog
+SyslogIdentifier=events_feed_fetch
+
+[Install]
+WantedBy=multi-user.target
+"
+
 echo "$SERVICE_CONTENT" | sudo tee /etc/systemd/system/events_feed_app.service > /dev/null
+echo "$FETCH_SERVICE_CONTENT" | sudo tee /etc/systemd/system/events_feed_fetch.service > /dev/null
 sudo systemctl daemon-reload
-sudo systemctl enable events_feed_app
-sudo systemctl start events_feed_app
-sudo systemctl status events_feed_app
+sudo systemctl enable events_feed_app events_feed_fetch
+sudo systemctl start events_feed_app events_feed_fetch
+sudo systemctl status events_feed_app events_feed_fetch
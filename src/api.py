@@ -0,0 +1,310 @@
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Final, NamedTuple, Optional
+from urllib.parse import parse_qs, urlparse
+
+from event import json_default
+from fetch import Source, setup_logging
+from ics import ICalendarFeed
+from storage import DataManager
+
+DEFAULT_PAGE_SIZE: Final = 500
+MAX_PAGE_SIZE: Final = 5000
+GZIP_MIN_SIZE: Final = 1024
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class EventsQuery(NamedTuple):
+    start: Optional[datetime]
+    end: Optional[datetime]
+    sources: set[str]
+    min_going: Optional[int]
+    limit: int
+    offset: int
+
+
+class Snapshot:
+    """Events of one data version, sorted by start time for range queries."""
+
+    def __init__(self, version: str, data: dict[str, Any], manifest: dict[str, Any]) -> None:
+        self.version = version
+        self.tag = hashlib.sha1(version.encode()).hexdigest()[:16]
+        self.date = data.get('date')
+        self.manifest = manifest
+
+        dated, self.undated = [], []
+        for event in data.get('events', []):
+            start = parse_datetime(event.get('start_time'))
+            if start is None:
+                self.undated.append(event)
+            else:
+                dated.append((start, event))
+        dated.sort(key=lambda item: item[0])
+        self.starts = [start for start, _ in dated]
+        self.events = [event for _, event in dated]
+
+    def query(
+        self,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        sources: set[str],
+        min_going: Optional[int],
+    ) -> list[dict[str, Any]]:
+        lo = bisect_left(self.starts, start) if start else 0
+        hi = bisect_right(self.starts, end) if end else len(self.starts)
+        events = self.events[lo:hi]
+        if start is None and end is None:
+            events = events + self.undated
+
+        if sources:
+            events = [event for event in events if event['source'] in sources]
+        if min_going is not None:
+            events = [event for event in events if going_at_least(event, min_going)]
+        return events
+
+
+class SnapshotStore:
+    """Keeps the latest snapshot in memory, reloaded only when the data version changes."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Snapshot] = None
+
+    def get(self) -> Snapshot:
+        version = DataManager.data_version()
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = Snapshot(
+                    version, DataManager.load_latest_data(), DataManager.load_manifest())
+                logging.info(f"API snapshot loaded: {version}")
+            return self._snapshot
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """
+        Read-only JSON API over the latest data.
+
+        GET /events?from=&to=&source=&min_going=&limit=&cursor=
+        GET /events.ics?source=&min_going=
+        GET /sources
+        GET /snapshot
+
+        ETags are derived from the data version and the request, so an unchanged
+        snapshot is answered with 304 before any event is touched.
+    """
+    store = SnapshotStore()
+    feed = ICalendarFeed()
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == '/events.ics':
+            try:
+                self.events_ics(params)
+            except ApiError as exc:
+                self.send_json(exc.status, {'error': str(exc)})
+            return
+
+        # Query parser and handler of each path
+        routes: dict[str, tuple[Callable[[Snapshot, dict[str, str]], Any], Callable]] = {
+            '/events': (parse_events_query, self.events),
+            '/sources': (lambda snapshot, params: params, self.sources),
+            '/snapshot': (lambda snapshot, params: params, self.snapshot),
+        }
+        route = routes.get(url.path.rstrip('/'))
+        if route is None:
+            self.send_json(404, {'error': f'Unknown path: {url.path}'})
+            return
+
+        try:
+            snapshot = self.store.get()
+            parse, handler = route
+            # Parsed before the conditional check, so a malformed request is never a 304
+            query = parse(snapshot, params)
+            etag = self.etag(snapshot, url.path, params)
+            if self.not_modified(etag):
+                return
+            self.send_json(200, handler(snapshot, query), etag)
+        except ApiError as exc:
+            self.send_json(exc.status, {'error': str(exc)})
+
+    def events(self, snapshot: Snapshot, query: EventsQuery) -> dict[str, Any]:
+        events = snapshot.query(query.start, query.end, query.sources, query.min_going)
+        offset = query.offset
+        page = events[offset:offset + query.limit]
+        next_offset = offset + len(page)
+        next_cursor = encode_cursor(snapshot, next_offset) if next_offset < len(events) else None
+        return {
+            'snapshot': snapshot.date,
+            'total': len(events),
+            'events': page,
+            'next_cursor': next_cursor,
+        }
+
+    def events_ics(self, params: dict[str, str]) -> None:
+        snapshot = self.store.get()
+        sources = parse_sources(params)
+        min_going = parse_param(params, 'min_going', int)
+        key = (snapshot.version, tuple(sorted(sources)), min_going)
+
+        etag = self.feed.cached_etag(key)
+        if etag and self.not_modified(self.variant(etag)):
+            return
+        body, etag = self.feed.render(
+            key, snapshot.query(None, None, sources, min_going), snapshot.date)
+        if self.not_modified(self.variant(etag)):
+            return
+        self.send_body(200, body, 'text/calendar; charset=utf-8', self.variant(etag))
+
+    def sources(self, snapshot: Snapshot, params: dict[str, str]) -> dict[str, Any]:
+        partitions = snapshot.manifest.get('sources', {})
+        return {
+            'sources': [
+                {'name': source.value, **partitions.get(source.value, {})} for source in Source
+            ],
+        }
+
+    def snapshot(self, snapshot: Snapshot, params: dict[str, str]) -> dict[str, Any]:
+        return {
+            'date': snapshot.date,
+            'events': len(snapshot.events) + len(snapshot.undated),
+            'sources': len(snapshot.manifest.get('sources', {})),
+        }
+
+    def etag(self, snapshot: Snapshot, path: str, params: dict[str, str]) -> str:
+        request = json.dumps([path, sorted(params.items())])
+        digest = hashlib.sha1(f'{snapshot.version}|{request}'.encode()).hexdigest()
+        return self.variant(f'"{digest}"')
+
+    def variant(self, etag: str) -> str:
+        # Strong ETags identify the exact bytes, the gzip representation gets its own
+        return f'{etag[:-1]}-gz"' if self.accepts_gzip() else etag
+
+    def not_modified(self, etag: str) -> bool:
+        if etag not in self.headers.get('If-None-Match', ''):
+            return False
+        self.send_response(304)
+        self.send_header('ETag', etag)
+        self.end_headers()
+        return True
+
+    def accepts_gzip(self) -> bool:
+        return 'gzip' in self.headers.get('Accept-Encoding', '')
+
+    def send_json(self, status: int, data: Any, etag: Optional[str] = None) -> None:
+        body = json.dumps(data, separators=(',', ':'), default=json_default).encode()
+        self.send_body(status, body, 'application/json', etag)
+
+    def send_body(
+        self,
+        status: int,
+        body: bytes,
+        content_type: str,
+        etag: Optional[str] = None,
+    ) -> None:
+        # Always compressed for gzip clients, so the ETag matches the bytes sent
+        compress = self.accepts_gzip() and (etag is not None or len(body) >= GZIP_MIN_SIZE)
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Vary', 'Accept-Encoding')
+        if compress:
+            body = gzip.compress(body, compresslevel=5)
+            self.send_header('Content-Encoding', 'gzip')
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.info(f"API {self.address_string()} {format % args}")
+
+
+def parse_datetime(value: Any) -> Optional[datetime]:
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def parse_param(params: dict[str, str], name: str, parse: Any) -> Any:
+    if name not in params:
+        return None
+    try:
+        value = parse(params[name])
+    except ValueError:
+        value = None
+    if value is None:
+        raise ApiError(400, f'Invalid {name}: {params[name]}')
+    return value
+
+
+def parse_events_query(snapshot: Snapshot, params: dict[str, str]) -> EventsQuery:
+    limit = parse_param(params, 'limit', int)
+    if limit is not None and limit <= 0:
+        raise ApiError(400, f'Invalid limit: {limit}')
+    return EventsQuery(
+        parse_param(params, 'from', parse_datetime),
+        parse_param(params, 'to', parse_datetime),
+        parse_sources(params),
+        parse_param(params, 'min_going', int),
+        min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE),
+        decode_cursor(params['cursor'], snapshot) if 'cursor' in params else 0,
+    )
+
+
+def parse_sources(params: dict[str, str]) -> set[str]:
+    return {source for source in params.get('source', '').split(',') if source}
+
+
+def going_at_least(event: dict[str, Any], min_going: int) -> bool:
+    """Same rule as the UI: events without a going count are kept."""
+    try:
+        return event.get('going') is None or int(event['going']) >= min_going
+    except (TypeError, ValueError):
+        return True
+
+
+def encode_cursor(snapshot: Snapshot, offset: int) -> str:
+    return base64.urlsafe_b64encode(f'{snapshot.tag}:{offset}'.encode()).decode()
+
+
+def decode_cursor(cursor: str, snapshot: Snapshot) -> int:
+    try:
+        tag, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        offset_value = int(offset)
+    except ValueError:
+        raise ApiError(400, 'Invalid cursor')
+    if tag != snapshot.tag:
+        raise ApiError(410, 'Snapshot changed, restart pagination')
+    return offset_value
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the events feed as a JSON API.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    args = parser.parse_args()
+
+    setup_logging()
+    server = ThreadingHTTPServer((args.host, args.port), ApiHandler)
+    logging.info(f"API listening on http://{args.host}:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,149 @@
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import date, timedelta
+from typing import Any, Final, Optional
+
+from event import UnifiedEvent
+from fetch import (SERVICES, Source, SplitFetcher, build_search_index,
+                   get_fetchers, get_parse_pool, parse_source, select_sources,
+                   setup_logging)
+from storage import DataManager, load_events, slugify, write_json
+
+# Payloads and parsed results not used for this long are pruned
+RETENTION: Final = timedelta(days=30)
+
+
+class PayloadArchive:
+    """
+        Raw source payloads stored by the hash of their content, next to the events
+        parsed from them.
+
+        A payload byte-identical to an earlier run maps to the same hash, so its parsed
+        and transformed events are reused instead of parsing it again. Parsed results
+        are only reused on the day they were produced, parsers filter past events
+        relative to today. After a change to a parser or to `schema_map`, `reparse`
+        rebuilds the partitions from the archived payloads without any request.
+    """
+    ARCHIVE_DIRECTORY = 'archive'
+
+    @classmethod
+    def store(cls, payload: Any) -> str:
+        content = encode_payload(payload)
+        digest = hashlib.sha256(content).hexdigest()
+        filename = cls._payload_filename(digest)
+        if os.path.exists(filename):
+            os.utime(filename)
+            return digest
+
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        tmp_filename = f'{filename}.{os.getpid()}.tmp'
+        with open(tmp_filename, 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=5))
+        os.replace(tmp_filename, filename)
+        return digest
+
+    @classmethod
+    def load(cls, digest: str) -> Any:
+        try:
+            with open(cls._payload_filename(digest), 'rb') as f:
+                return json.loads(gzip.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def load_parsed(cls, source: str, digest: str) -> Optional[list[UnifiedEvent]]:
+        filename = cls._parsed_filename(source, digest)
+        try:
+            with open(filename, 'r') as f:
+                parsed = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if parsed['parsed_on'] != date.today().isoformat():
+            return None
+        os.utime(filename)
+        return load_events(parsed['events'])
+
+    @classmethod
+    def save_parsed(cls, source: str, digest: str, events: list[UnifiedEvent]) -> None:
+        write_json(
+            cls._parsed_filename(source, digest),
+            {'parsed_on': date.today().isoformat(), 'events': events},
+        )
+
+    @classmethod
+    def prune(cls) -> None:
+        threshold = time.time() - RETENTION.total_seconds()
+        removed = 0
+        for root, _, files in os.walk(cls._directory()):
+            for name in files:
+                filename = os.path.join(root, name)
+                if os.path.getmtime(filename) < threshold:
+                    os.remove(filename)
+                    removed += 1
+        if removed:
+            logging.info(f"Archive pruned: {removed} files")
+
+    @classmethod
+    def _directory(cls) -> str:
+        return os.path.join(DataManager.DATA_DIRECTORY, cls.ARCHIVE_DIRECTORY)
+
+    @classmethod
+    def _payload_filename(cls, digest: str) -> str:
+        return os.path.join(cls._directory(), 'payloads', digest[:2], f'{digest}.json.gz')
+
+    @classmethod
+    def _parsed_filename(cls, source: str, digest: str) -> str:
+        return os.path.join(cls._directory(), 'parsed', slugify(source), f'{digest}.json')
+
+
+def encode_payload(payload: Any) -> bytes:
+    return json.dumps(payload, sort_keys=True, separators=(',', ':')).encode()
+
+
+def reparse(sources: Optional[list[Source]] = None) -> None:
+    """Parses and transforms again the archived payloads of the current partitions."""
+    # Disabled sources keep their partitions too, they are reparsed like the others
+    selected = sources or list(SERVICES)
+    fetchers = {source.value: fetch for source, fetch in get_fetchers(1, selected)}
+    manifest = DataManager.load_manifest()
+    snapshot = DataManager.new_snapshot()
+    pool = get_parse_pool()
+
+    jobs = []
+    for source, partition in manifest.get('sources', {}).items():
+        if sources and source not in fetchers:
+            continue
+        digest = partition.get('payload')
+        payload = PayloadArchive.load(digest) if digest else None
+        if source not in fetchers or payload is None:
+            logging.warning(f"{source} has no archived payload, skipped")
+            continue
+        fetch = fetchers[source]
+        parse = fetch.parse if isinstance(fetch, SplitFetcher) else None
+        jobs.append((source, digest, pool.submit(parse_source, source, parse, payload)))
+
+    for source, digest, future in jobs:
+        events = future.result()
+        PayloadArchive.save_parsed(source, digest, events)
+        DataManager.save_partition(snapshot, source, events, payload=digest)
+
+    build_search_index()
+    logging.info(f"Reparsed {len(jobs)} sources from the archive")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rebuild events from archived payloads.")
+    parser.add_argument('--sources', help="Comma separated sources, e.g. meetup,gcd")
+    args = parser.parse_args()
+
+    try:
+        selected = select_sources(args.sources.split(',')) if args.sources else None
+    except ValueError as exc:
+        parser.error(str(exc))
+    setup_logging()
+    reparse(selected)
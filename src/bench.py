@@ -0,0 +1,254 @@
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Final
+
+from event import FIELDS
+from fetch import Source
+from storage import DataManager, load_events
+
+# Share in percent of the largest sources, the other sources split the rest evenly
+SOURCE_WEIGHTS: Final = {
+    Source.MEETUP: 40,
+    Source.GCD: 15,
+    Source.EVENTBRITE: 10,
+    Source.C2CGLOBAL: 5,
+}
+# None stands for times written in UTC with an offset and no timezone name
+TIMEZONES: Final = ['UTC', 'Europe/London', 'America/New_York', 'Asia/Kolkata', 'Europe/Kyiv', None]
+TOPICS: Final = ['Kafka', 'Postgres', 'Python', 'Spark', 'Kubernetes', 'Rust', 'LLM', 'Scala']
+SCALING_SIZES: Final = '10000,100000,1000000'
+# Imports paid before the first render of the Streamlit process and before the first
+# request of the fetch job, with their budget in seconds
+STARTUP_TARGETS: Final = {
+    'ui': ('import ui', 1.5),
+    'fetch': ('import fetch; fetch.get_fetchers(1)', 1.0),
+}
+
+
+def synthetic_events(count: int, seed: int = 0) -> list[dict[str, Any]]:
+    """
+        Unified schema events shaped like the fetched ones, reproducible for a seed.
+        A few events are multi-day conferences or date-only, many have no going count.
+    """
+    rng = random.Random(seed)
+    sources = [source.value for source in Source]
+    rest = (100 - sum(SOURCE_WEIGHTS.values())) / (len(Source) - len(SOURCE_WEIGHTS))
+    weights = [SOURCE_WEIGHTS.get(source, rest) for source in Source]
+    start = datetime(2024, 1, 1)
+
+    events = []
+    for n, source in enumerate(rng.choices(sources, weights, k=count)):
+        begin = start + timedelta(minutes=15 * rng.randrange(365 * 24 * 4))
+        if rng.random() < 0.05:
+            length = timedelta(days=rng.randint(1, 14))
+        else:
+            length = timedelta(hours=rng.randint(1, 8))
+        timezone = rng.choice(TIMEZONES)
+        if rng.random() < 0.02:
+            start_time, end_time = begin.date().isoformat(), None
+        elif timezone is None:
+            start_time, end_time = f'{begin.isoformat()}Z', f'{(begin + length).isoformat()}Z'
+        else:
+            start_time, end_time = begin.isoformat(), (begin + length).isoformat()
+        topic = rng.choice(TOPICS)
+
+        events.append(dict(zip(FIELDS, [
+            source,
+            f'{n:08d}',
+            f'{topic} {rng.choice(["Meetup", "Summit", "Workshop", "Webinar"])} #{n}',
+            start_time,
+            end_time,
+            timezone,
+            None if rng.random() < 0.4 else int(rng.paretovariate(1.2) * 5),
+            f'Talks and networking about {topic}. ' * rng.randint(1, 10),
+            f'https://example.com/events/{n}',
+            None,
+            rng.random() < 0.3,
+        ])))
+    return events
+
+
+def write_snapshot(events: list[dict[str, Any]], snapshot: str = 'synthetic') -> None:
+    """Commits `events` as one partition per source, like a fetch of every source."""
+    by_source: dict[str, list[dict[str, Any]]] = {}
+    for event in events:
+        by_source.setdefault(event['source'], []).append(event)
+    for source, source_events in by_source.items():
+        DataManager.save_partition(snapshot, source, source_events)
+
+
+def timed(call: Callable[[], Any]) -> tuple[Any, float]:
+    start = time.perf_counter()
+    result = call()
+    return result, time.perf_counter() - start
+
+
+def retained_size(build: Callable[[], Any]) -> tuple[Any, int]:
+    """Result of `build` and the bytes still allocated once it returns."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def bench_memory(args: argparse.Namespace) -> None:
+    """Memory of a snapshot held as loaded dicts and as compact events."""
+    content = json.dumps({'events': synthetic_events(args.events)})
+
+    dicts, dict_size = retained_size(lambda: json.loads(content)['events'])
+    del dicts
+    compact, compact_size = retained_size(lambda: load_events(json.loads(content)['events']))
+    del compact
+
+    print(f"{args.events} events")
+    print(f"  dict events:    {dict_size / 2**20:8.1f} MiB")
+    print(f"  compact events: {compact_size / 2**20:8.1f} MiB")
+    print(f"  reduction:      {1 - compact_size / dict_size:8.1%}")
+
+
+def cold_start(statement: str) -> float:
+    """Seconds `statement` takes in a fresh interpreter, nothing imported yet."""
+    code = (
+        'import time; start = time.perf_counter(); '
+        f'{statement}; '
+        'print(time.perf_counter() - start)'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.split()[-1])
+
+
+def bench_startup(args: argparse.Namespace) -> None:
+    """Cold start of the Streamlit process and of the fetch job against their budget."""
+    over_budget = []
+    for name, (statement, budget) in STARTUP_TARGETS.items():
+        median = statistics.median(cold_start(statement) for _ in range(args.runs))
+        print(f"{name:6} {median * 1000:8.0f} ms (budget {budget * 1000:.0f} ms)")
+        if median > budget:
+            over_budget.append(name)
+    if over_budget:
+        sys.exit(f"Over the startup budget: {', '.join(over_budget)}")
+
+
+def bench_generate(args: argparse.Namespace) -> None:
+    """Writes a synthetic snapshot to the data directory."""
+    DataManager.DATA_DIRECTORY = args.data_dir
+    write_snapshot(synthetic_events(args.events, args.seed))
+    print(f"{args.events} synthetic events written to {args.data_dir}")
+
+
+def bench_ui(args: argparse.Namespace) -> None:
+    """UI load, filter and serialize time and calendar payload size per snapshot size."""
+    import pandas as pd
+
+    from ui import (EventIndex, EventManager, calendar_events,
+                    get_visible_window)
+
+    window = get_visible_window({'start': '2024-06-01', 'end': '2024-07-01'})
+    print(f"{'events':>9} {'load':>8} {'index':>8} {'filter':>8} {'serialize':>9} {'payload':>10}")
+    for size in [int(size) for size in args.sizes.split(',')]:
+        with tempfile.TemporaryDirectory() as directory:
+            DataManager.DATA_DIRECTORY = directory
+            write_snapshot(synthetic_events(size))
+            data, load = timed(DataManager.load_latest_data)
+
+        index, build = timed(
+            lambda: EventIndex(EventManager._transform_data(pd.DataFrame(data['events']))))
+        # Default view: current month, every source, minimum going of 10
+        df_events, filter_time = timed(lambda: index.window(*window, [], 10))
+        payload, serialize = timed(lambda: json.dumps(calendar_events(df_events)).encode())
+
+        print(
+            f"{size:>9} {load:>7.2f}s {build:>7.2f}s {filter_time * 1000:>6.1f}ms "
+            f"{serialize * 1000:>7.1f}ms {len(payload) / 2**10:>7.0f}KiB"
+        )
+
+
+def bench_pipeline(args: argparse.Namespace) -> None:
+    """Full fetch of the selected sources against local mock upstreams, over HTTP."""
+    base_url = f'http://127.0.0.1:{args.port}'
+    # Read by services.py when it is imported, by the mock server below at the latest
+    os.environ['EVENTS_FEED_BASE_URL'] = base_url
+    fixtures = os.path.abspath(args.fixtures)
+    sources = args.sources.split(',') if args.sources else None
+    from http.server import ThreadingHTTPServer
+
+    from fetch import main, select_sources
+    from mock_server import HostProfile, MockHandler, MockUpstream
+
+    profile = HostProfile(args.latency, args.jitter, args.error_rate, args.bandwidth)
+    MockHandler.upstream = MockUpstream(fixtures, default_profile=profile)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), MockHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # Data, logs and scraper state of the run stay out of the working copy
+        os.chdir(directory)
+        try:
+            _, duration = timed(
+                lambda: main(force=True, sources=select_sources(sources)))
+            with open(os.path.join(DataManager.DATA_DIRECTORY, DataManager.RUNS_FILE)) as f:
+                runs = [json.loads(line) for line in f]
+        finally:
+            os.chdir(cwd)
+            server.shutdown()
+
+    print(f"Fetched {len(runs)} sources from {base_url} in {duration:.2f}s")
+    for run in runs:
+        print(f"  {run['source']:12} {run['state']:6} {run['duration']:>7.2f}s {run['events']:>6}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks of the events feed.")
+    subparsers = parser.add_subparsers(required=True)
+
+    memory = subparsers.add_parser('memory', help=bench_memory.__doc__)
+    memory.add_argument('--events', type=int, default=100_000)
+    memory.set_defaults(run=bench_memory)
+
+    startup = subparsers.add_parser('startup', help=bench_startup.__doc__)
+    startup.add_argument('--runs', type=int, default=5)
+    startup.set_defaults(run=bench_startup)
+
+    generate = subparsers.add_parser('generate', help=bench_generate.__doc__)
+    generate.add_argument('--events', type=int, default=100_000)
+    generate.add_argument('--seed', type=int, default=0)
+    generate.add_argument('--data-dir', default=DataManager.DATA_DIRECTORY)
+    generate.set_defaults(run=bench_generate)
+
+    scaling = subparsers.add_parser('ui', help=bench_ui.__doc__)
+    scaling.add_argument('--sizes', default=SCALING_SIZES, help="Comma separated event counts")
+    scaling.set_defaults(run=bench_ui)
+
+    pipeline = subparsers.add_parser('pipeline', help=bench_pipeline.__doc__)
+    pipeline.add_argument('--sources', help="Comma separated sources, the enabled ones by default")
+    pipeline.add_argument('--fixtures', default='mock_data')
+    pipeline.add_argument('--port', type=int, default=8601)
+    pipeline.add_argument('--latency', type=float, default=0.1)
+    pipeline.add_argument('--jitter', type=float, default=0.05)
+    pipeline.add_argument('--error-rate', type=float, default=0.0)
+    pipeline.add_argument('--bandwidth', type=float, default=0.0, help="Bytes/s, 0 unlimited")
+    pipeline.set_defaults(run=bench_pipeline)
+
+    args = parser.parse_args()
+    args.run(args)
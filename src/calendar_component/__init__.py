@@ -1,6 +1,8 @@
 # mypy: ignore-errors
+import itertools
 import os
 
+import streamlit as st
 import streamlit.components.v1 as components
 
 DEV = __name__ == '__main__'
@@ -22,9 +24,19 @@ def calendar(
     custom_css="",
     license_key="CC-Attribution-NonCommercial-NoDerivatives",
     key=None,
+    sources=None,
 ):
+    """
+        `events` is a list of FullCalendar event dicts or a columnar dict of
+        equal length lists ({"id": [...], "start": [...], ...}) expanded on the client.
+        In the columnar form a "source" column holds indexes into `sources`,
+        a list of {"name", "color"} dicts, so colors are sent once per source.
+    """
+    payload = _events_payload(events, key)
+    payload['sources'] = sources or []
+
     component_value = _component_func(
-        events=events,
+        events=payload,
         options=options,
         custom_css=custom_css,
         license_key=license_key,
@@ -35,9 +47,58 @@ def calendar(
     return component_value
 
 
-if __name__ == '__main__':
-    import streamlit as st
+_keyless_revisions = itertools.count(1)
+
+
+def _events_payload(events, key):
+    """
+        Events are sent as a diff against the previous call with the same key:
+        {"revision", "base", "added", "removed"}, `base` is None for a full reset.
+        The frontend applies a diff only on top of `base` and asks for a reset
+        (a new "resync" counter in its value) when it is out of sync.
+        Diffing needs a key and an "id" on every event.
+    """
+    if isinstance(events, dict):
+        ids = events.get('id', [])
+        rows = list(zip(*events.values()))
+    else:
+        ids = [event.get('id') for event in events]
+        rows = events
+
+    if key is None or None in ids:
+        return {'revision': next(_keyless_revisions), 'base': None, 'added': events, 'removed': []}
 
+    state_key = f'_calendar_events_{key}'
+    sent = st.session_state.get(state_key)
+    resync = (st.session_state.get(key) or {}).get('resync', 0)
+    current = dict(zip(ids, rows))
+
+    if sent is None or sent['resync'] != resync:
+        revision = sent['revision'] + 1 if sent else 1
+        payload = {'revision': revision, 'base': None, 'added': events, 'removed': []}
+    else:
+        previous = sent['events']
+        removed = [id_ for id_, row in previous.items() if current.get(id_) != row]
+        added = [i for i, (id_, row) in enumerate(zip(ids, rows)) if previous.get(id_) != row]
+        revision = sent['revision'] + 1 if removed or added else sent['revision']
+        payload = {
+            'revision': revision,
+            'base': sent['revision'],
+            'added': _take(events, added),
+            'removed': removed,
+        }
+
+    st.session_state[state_key] = {'revision': revision, 'resync': resync, 'events': current}
+    return payload
+
+
+def _take(events, positions):
+    if isinstance(events, dict):
+        return {name: [column[i] for i in positions] for name, column in events.items()}
+    return [events[i] for i in positions]
+
+
+if __name__ == '__main__':
     st.set_page_config(page_title="Calendar")
 
     mode = st.selectbox(
@@ -9,9 +9,9 @@ import resourceTimeGridPlugin from "@fullcalendar/resource-timegrid" // premium
 import resourceTimelinePlugin from "@fullcalendar/resource-timeline" // premium
 import timeGridPlugin from "@fullcalendar/timegrid"
 import timelinePlugin from "@fullcalendar/timeline" // premium
-import { EventClickArg } from "@fullcalendar/core"
+import { DatesSetArg, EventClickArg, EventInput } from "@fullcalendar/core"
 import { ReactNode, createRef } from "react"
-import { StreamlitComponentBase, withStreamlitConnection } from "streamlit-component-lib"
+import { Streamlit, StreamlitComponentBase, withStreamlitConnection } from "streamlit-component-lib"
 import styled from "styled-components"
 import "./Calendar.css"
 
@@ -26,16 +26,73 @@ const FullCalendarWrapper = styled.div<{ $customCSS?: string }>`
   ${(props) => props.$customCSS}
 `;
 
+interface ComponentValue {
+  start?: string
+  end?: string
+  resync: number
+}
+
+interface SourceInfo {
+  name: string
+  color: string
+}
+
+// Parallel arrays, one per event field, "source" holds indexes into `sources`.
+type ColumnarEvents = Record<string, any[]>
+
+// Diff against the events of the `base` revision, `base` is null for a full reset.
+interface EventsPayload {
+  revision: number
+  base: number | null
+  added: EventInput[] | ColumnarEvents
+  removed: string[]
+  sources: SourceInfo[]
+}
+
+const expandEvents = (events: EventInput[] | ColumnarEvents, sources: SourceInfo[]): EventInput[] => {
+  if (Array.isArray(events)) {
+    return events
+  }
+
+  const fields = Object.keys(events)
+  const length = fields.length ? events[fields[0]].length : 0
+  const expanded: EventInput[] = []
+  for (let i = 0; i < length; i++) {
+    const event: EventInput = {}
+    for (const field of fields) {
+      const value = events[field][i]
+      if (field === "source") {
+        const source = sources[value]
+        event.source = source.name
+        event.backgroundColor = source.color
+        event.borderColor = source.color
+      } else {
+        event[field] = value
+      }
+    }
+    expanded.push(event)
+  }
+  return expanded
+}
+
 class Calendar extends StreamlitComponentBase<State> {
   calendarRef = createRef<HTMLDivElement>();
+  fullCalendarRef = createRef<FullCalendar>();
+  componentValue: ComponentValue = { resync: 0 };
+  revision = 0;
 
   componentDidMount() {
     super.componentDidMount?.();
+    this.applyEvents();
     this.scrollToCurrentTime();
   }
 
+  componentDidUpdate() {
+    super.componentDidUpdate?.();
+    this.applyEvents();
+  }
+
   public render = (): ReactNode => {
-    const events = this.props.args["events"]
     const options = this.props.args["options"]
     const customCSS = this.props.args["custom_css"]
     const licenseKey = this.props.args["license_key"]
@@ -56,9 +113,10 @@ class Calendar extends StreamlitComponentBase<State> {
     return (
       <FullCalendarWrapper $customCSS={customCSS} ref={this.calendarRef}>
         <FullCalendar
+          ref={this.fullCalendarRef}
           plugins={plugins}
-          initialEvents={events}
           schedulerLicenseKey={licenseKey}
+          datesSet={this.handleDatesSet}
           eventClick={this.handleEventClick}
           eventContent={this.eventContent}
           {...options}
@@ -67,6 +125,33 @@ class Calendar extends StreamlitComponentBase<State> {
     )
   }
 
+  // Events are updated in place, so filter changes keep the calendar view and scroll position.
+  private applyEvents() {
+    const payload: EventsPayload = this.props.args["events"]
+    const api = this.fullCalendarRef.current?.getApi()
+    if (!api || payload.revision === this.revision) {
+      return
+    }
+    if (payload.base !== null && payload.base !== this.revision) {
+      this.setComponentValue({ resync: this.componentValue.resync + 1 })
+      return
+    }
+
+    api.batchRendering(() => {
+      if (payload.base === null) {
+        api.removeAllEvents()
+      }
+      payload.removed.forEach((id) => api.getEventById(id)?.remove())
+      expandEvents(payload.added, payload.sources).forEach((event) => api.addEvent(event))
+    })
+    this.revision = payload.revision
+  }
+
+  private setComponentValue(value: Partial<ComponentValue>) {
+    this.componentValue = { ...this.componentValue, ...value }
+    Streamlit.setComponentValue(this.componentValue)
+  }
+
   private scrollToCurrentTime() {
     const currentDate = new Date();
     const formattedDay = currentDate.toISOString().split('T')[0];
@@ -90,6 +175,14 @@ class Calendar extends StreamlitComponentBase<State> {
     );
   }
 
+  // Python only sends events around the visible range, report it on every navigation.
+  private handleDatesSet = (arg: DatesSetArg) => {
+    if (arg.startStr === this.componentValue.start && arg.endStr === this.componentValue.end) {
+      return
+    }
+    this.setComponentValue({ start: arg.startStr, end: arg.endStr })
+  }
+
   private handleEventClick = (arg: EventClickArg) => {
     arg.jsEvent.preventDefault();
     window.open(arg.event.url, "_blank");
@@ -0,0 +1,66 @@
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Final, Optional
+
+from archive import PayloadArchive
+from fetch import (Fetcher, Source, build_search_index, fetch_sources,
+                   get_fetchers, select_sources, setup_logging)
+from scheduler import RefreshScheduler
+from storage import DataManager
+
+MAX_SLEEP: Final = timedelta(minutes=1)
+
+
+class FetchDaemon:
+    """
+        Refreshes every source when its adaptive TTL expires, independently of the
+        Streamlit UI. Sources are committed to their partitions like a regular fetch,
+        so the UI only reads the data.
+    """
+
+    def __init__(self, delta_days: int, sources: Optional[list[Source]] = None) -> None:
+        self.fetchers: dict[Source, Fetcher] = dict(get_fetchers(delta_days, sources))
+        self.scheduler = RefreshScheduler.load()
+
+    def run(self) -> None:
+        logging.info(f"Fetch daemon started for {len(self.fetchers)} sources")
+        while True:
+            self.run_due()
+            next_run = min(self.scheduler.next_run(source) for source in self.fetchers)
+            sleep = min(next_run - datetime.now(), MAX_SLEEP)
+            time.sleep(max(sleep.total_seconds(), 0))
+
+    def run_due(self) -> None:
+        # Fetches started from the UI record their runs in the meantime
+        self.scheduler = RefreshScheduler.load()
+        due = self.scheduler.due(list(self.fetchers))
+        if not due:
+            return
+
+        fetchers = [(source, self.fetchers[source]) for source in due]
+        results = fetch_sources(fetchers, DataManager.new_snapshot())
+        with RefreshScheduler.updating() as scheduler:
+            for source, events in results.events.items():
+                scheduler.record(source, events)
+                logging.info(f"{source.value} next refresh in {scheduler.ttl(source)}")
+            for source in results.failed:
+                scheduler.defer(source)
+        self.scheduler = scheduler
+        build_search_index()
+        PayloadArchive.prune()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Refresh event sources on a schedule.")
+    parser.add_argument('--delta-days', type=int, default=3)
+    parser.add_argument('--sources', help="Comma separated sources, enabled ones by default")
+    args = parser.parse_args()
+
+    try:
+        selected = select_sources(args.sources.split(',')) if args.sources else None
+    except ValueError as exc:
+        parser.error(str(exc))
+    setup_logging()
+    FetchDaemon(args.delta_days, selected).run()
@@ -0,0 +1,73 @@
+import sys
+from collections.abc import Iterator, Mapping
+from typing import Any, Final
+
+# Unified schema, in the order events are exported
+FIELDS: Final = (
+    'source',
+    'id',
+    'title',
+    'start_time',
+    'end_time',
+    'timezone',
+    'going',
+    'description',
+    'event_url',
+    'image_url',
+    'is_online_event',
+)
+# Few distinct values repeated across every event, shared instead of copied
+INTERNED_FIELDS: Final = ('source', 'timezone')
+
+
+class UnifiedEvent(Mapping):
+    """
+        One event of the unified schema, stored in slots instead of a per-event dict.
+
+        Reads like a read-only dict (`event['title']`, `event.get('going')`, `items()`),
+        so the UI, API and search keep working on it; `to_dict` is the JSON export.
+    """
+    __slots__ = FIELDS
+
+    def __init__(self, *values: Any) -> None:
+        for field, value in zip(FIELDS, values):
+            if field in INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            object.__setattr__(self, field, value)
+
+    @classmethod
+    def from_dict(cls, event: Mapping[str, Any]) -> 'UnifiedEvent':
+        if isinstance(event, cls):
+            return event
+        return cls(*(event.get(field) for field in FIELDS))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def __reduce__(self) -> tuple[Any, tuple[Any, ...]]:
+        # Values only, parsed events cross the parse pool without their field names
+        return type(self), tuple(getattr(self, field) for field in FIELDS)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.to_dict()!r})'
+
+
+def json_default(value: Any) -> Any:
+    """`default` of json.dump for data holding events, other types are still an error."""
+    if isinstance(value, UnifiedEvent):
+        return value.to_dict()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
@@ -1,25 +1,21 @@
-import glob
-import json
 import logging
 import os
 import sys
-from collections.abc import Collection
+import time
+from collections.abc import Collection, Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from enum import Enum
-from typing import Any, Callable, Dict, List, Union
+from functools import cache, partial
+from typing import (Any, Callable, Dict, Final, List, NamedTuple, Optional,
+                    Union)
+from urllib.parse import urlsplit
 
 import jmespath
-from prettytable import PrettyTable
-
-from services import (BloombergService, C2CGlobalService,
-                      CloudnairGoogleService, CohereService, ConfTechService,
-                      DatabricksService, DatastaxService, DbtService,
-                      DevEventsService, EventycoService, GDGService,
-                      GithubService, HopsworksService, LinuxFoundationService,
-                      MeetupService, NVIDIAService, PostgresService,
-                      PythonService, SamsungService, ScalaLangService,
-                      SnowflakeService, TechCrunchService, TechMemeService,
-                      TSMCService, WeaviateService)
+
+from event import UnifiedEvent
+from storage import DataManager, slugify
 
 Transformer = Union[str, Callable]
 
@@ -68,76 +64,316 @@ class Source(Enum):
     SNOWFLAKE = "Snowflake"
 
 
-def main(delta_days: int = 3) -> None:
+Fetcher = Callable[[], list[dict[str, Any]]]
+# Called with (source, state, events count) as every source starts and finishes
+ProgressCallback = Callable[[str, str, int], None]
+
+
+class SplitFetcher(NamedTuple):
+    """
+        Source fetched in two steps: `download` does the network I/O in the fetching
+        process, the pure `parse` of the raw payload runs on the parse pool.
+    """
+    download: Callable[[], Any]
+    parse: Callable[[Any], list[dict[str, Any]]]
+
+    def __call__(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+
+class ServiceSpec(NamedTuple):
+    """
+        How a source is fetched. `service` is the class in services.py and `url` the name
+        of the constant there its requests go to. `cost` is the usual number of requests
+        of one run, so callers can order and spread sources from data.
+    """
+    service: str
+    url: str
+    cost: int = 1
+    with_delta_days: bool = False
+    # Disabled sources are only fetched when selected by name
+    enabled: bool = True
+
+    @property
+    def host(self) -> str:
+        """Server the requests go to, the mock server under EVENTS_FEED_BASE_URL."""
+        import services
+        return urlsplit(getattr(services, self.url)).netloc
+
+
+SERVICES: Final[dict[Source, ServiceSpec]] = {
+    Source.EVENTBRITE: ServiceSpec(
+        'EventbriteService', 'EVENTBRITE_URL', cost=10, with_delta_days=True, enabled=False),
+    Source.MEETUP: ServiceSpec('MeetupService', 'MEETUP_URL', cost=12, with_delta_days=True),
+    Source.GCD: ServiceSpec('GDGService', 'GDG_URL', cost=3),
+    Source.CONFTECH: ServiceSpec('ConfTechService', 'CONF_TECH_URL'),
+    Source.C2CGLOBAL: ServiceSpec('C2CGlobalService', 'C2CGLOBAL_URL', cost=2),
+    Source.DATABRICKS: ServiceSpec('DatabricksService', 'DATABRICKS_URL'),
+    Source.DATASTAX: ServiceSpec('DatastaxService', 'DATASTAX_URL', cost=2),
+    Source.SCALA_LANG: ServiceSpec('ScalaLangService', 'SCALA_LANG_URL'),
+    Source.CASSANDRA: ServiceSpec('CassandraService', 'CASSANDRA_URL', enabled=False),
+    Source.LINUX_FOUNDATION: ServiceSpec('LinuxFoundationService', 'LINUX_FOUNDATION_URL'),
+    Source.WEAVIATE: ServiceSpec('WeaviateService', 'WEAVIATE_URL'),
+    Source.REDIS: ServiceSpec('RedisService', 'REDIS_URL', cost=3, enabled=False),
+    Source.POSTGRES: ServiceSpec('PostgresService', 'POSTGRES_URL'),
+    Source.HOPSWORKS: ServiceSpec('HopsworksService', 'HOPSWORKS_URL'),
+    Source.PYTHON: ServiceSpec('PythonService', 'PYTHON_URL'),
+    Source.EVENTYCO: ServiceSpec('EventycoService', 'EVENTYCO_URL', cost=3),
+    Source.DBT: ServiceSpec('DbtService', 'DBT_URL'),
+    Source.DEV_EVENTS: ServiceSpec('DevEventsService', 'DEV_EVENTS_URL', cost=5),
+    Source.TECH_CRUNCH: ServiceSpec('TechCrunchService', 'TECH_CRUNCH_URL', enabled=False),
+    Source.TECH_MEME: ServiceSpec('TechMemeService', 'TECH_MEME_URL'),
+    Source.BLOOMBERG: ServiceSpec('BloombergService', 'BLOOMBERG_URL'),
+    Source.CLOUDNAIR_GOOGLE: ServiceSpec('CloudnairGoogleService', 'CLOUDNAIR_GOOGLE_URL'),
+    Source.COHERE: ServiceSpec('CohereService', 'COHERE_URL', enabled=False),
+    Source.SAMSUNG: ServiceSpec('SamsungService', 'SAMSUNG_URL'),
+    Source.TSMC: ServiceSpec('TSMCService', 'TSMC_URL'),
+    Source.NVIDIA: ServiceSpec('NVIDIAService', 'NVIDIA_URL'),
+    Source.GITHUB: ServiceSpec('GithubService', 'GITHUB_URL'),
+    Source.SNOWFLAKE: ServiceSpec('SnowflakeService', 'SNOWFLAKE_URL'),
+}
+
+
+def select_sources(names: Optional[Iterable[str]] = None) -> list[Source]:
+    """
+        Enabled sources by default, otherwise the named ones in registry order.
+        Names match the source value or its slug, case-insensitively.
+    """
+    if names is None:
+        return [source for source, spec in SERVICES.items() if spec.enabled]
+
+    aliases = {}
+    for source in SERVICES:
+        aliases[source.value.lower()] = aliases[slugify(source.value)] = source
+    unknown = [name for name in names if name.strip().lower() not in aliases]
+    if unknown:
+        choices = ', '.join(slugify(source.value) for source in SERVICES)
+        raise ValueError(f"Unknown sources: {', '.join(unknown)}, choose from {choices}")
+    selected = {aliases[name.strip().lower()] for name in names}
+    return [source for source in SERVICES if source in selected]
+
+
+def get_fetchers(
+    delta_days: int,
+    sources: Optional[Collection[Source]] = None,
+) -> list[tuple[Source, Fetcher]]:
+    # services pulls in the scraping dependencies, only processes that fetch import it
+    import services
+
+    fetchers = []
+    for source in select_sources() if sources is None else sources:
+        spec = SERVICES[source]
+        args = (delta_days,) if spec.with_delta_days else ()
+        fetchers.append((source, split_fetcher(getattr(services, spec.service)(), *args)))
+    return fetchers
+
+
+def split_fetcher(service: Any, *args: Any) -> Fetcher:
+    # Paginated scrapers decide on the next page from parsed content, they stay in one step.
+    # Their archived payload is then the scraped events, with ids derived from the events
+    # so unchanged pages still hash the same.
+    if not hasattr(service, 'parse'):
+        return partial(service.fetch_events, *args)
+    return SplitFetcher(partial(service.download, *args), service.parse)
+
+
+@cache
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Pool for the CPU-bound parse stage, one process per core, reused by every fetch."""
+    return ProcessPoolExecutor(max_workers=os.cpu_count())
+
+
+def replace_parse_pool(broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+    """
+        Parse pool to use once a dead worker broke `broken`, which fails every task
+        submitted to it from then on. Replaced only once, however many tasks it failed.
+    """
+    if get_parse_pool() is broken:
+        logging.warning("Parse pool broken by a dead worker, starting a new one")
+        get_parse_pool.cache_clear()
+        broken.shutdown(wait=False, cancel_futures=True)
+    return get_parse_pool()
+
+
+def main(
+    delta_days: int = 3,
+    progress: Optional[ProgressCallback] = None,
+    force: bool = False,
+    sources: Optional[list[Source]] = None,
+) -> None:
+    """
+        Refreshes the sources due according to their TTL, or all of them with `force`.
+        Selected `sources` are refreshed whether they are due or not.
+        The others keep their partitions from earlier snapshots.
+    """
+    # archive and scheduler import Source and DataManager from this module
+    from archive import PayloadArchive
+    from scheduler import RefreshScheduler
     setup_logging()
 
-    # eb_events = EventbriteService().fetch_events(delta_days)
-    # cassandra_events = CassandraService().fetch_events()
-    # redis_events = RedisService().fetch_events()
-    # tech_crunch_events = TechCrunchService().fetch_events()
-    # cohere_events = CohereService().fetch_events()
-
-    meetup_events = MeetupService().fetch_events(delta_days)
-    gdg_events = GDGService().fetch_events()
-    conf_tech_events = ConfTechService().fetch_events()
-    c2c_global_events = C2CGlobalService().fetch_events()
-    databricks_events = DatabricksService().fetch_events()
-    datastax_events = DatastaxService().fetch_events()
-    scala_lang_events = ScalaLangService().fetch_events()
-    linux_foundation_events = LinuxFoundationService().fetch_events()
-    weaviate_events = WeaviateService().fetch_events()
-    postgres_events = PostgresService().fetch_events()
-    hopsworks_events = HopsworksService().fetch_events()
-    python_events = PythonService().fetch_events()
-    eventyco_events = EventycoService().fetch_events()
-    dbt_events = DbtService().fetch_events()
-    devevents_events = DevEventsService().fetch_events()
-    tech_meme_events = TechMemeService().fetch_events()
-    bloomberg_events = BloombergService().fetch_events()
-    cloudnair_events = CloudnairGoogleService().fetch_events()
-    samsung_events = SamsungService().fetch_events()
-    tsmc_events = TSMCService().fetch_events()
-    nvidia_events = NVIDIAService().fetch_events()
-    github_events = GithubService().fetch_events()
-    snowflake_events = SnowflakeService().fetch_events()
-
-    events = transform_events(
-        # (Source.EVENTBRITE.value, eb_events),
-        # (Source.CASSANDRA.value, cassandra_events),
-        # (Source.REDIS.value, redis_events),
-        # (Source.TECH_CRUNCH.value, tech_crunch_events),
-        # (Source.COHERE.value, cohere_events),
-
-        (Source.MEETUP.value, meetup_events),
-        (Source.GCD.value, gdg_events),
-        (Source.CONFTECH.value, conf_tech_events),
-        (Source.C2CGLOBAL.value, c2c_global_events),
-        (Source.DATABRICKS.value, databricks_events),
-        (Source.DATASTAX.value, datastax_events),
-        (Source.SCALA_LANG.value, scala_lang_events),
-        (Source.LINUX_FOUNDATION.value, linux_foundation_events),
-        (Source.WEAVIATE.value, weaviate_events),
-        (Source.POSTGRES.value, postgres_events),
-        (Source.HOPSWORKS.value, hopsworks_events),
-        (Source.PYTHON.value, python_events),
-        (Source.EVENTYCO.value, eventyco_events),
-        (Source.DBT.value, dbt_events),
-        (Source.DEV_EVENTS.value, devevents_events),
-        (Source.TECH_MEME.value, tech_meme_events),
-        (Source.BLOOMBERG.value, bloomberg_events),
-        (Source.CLOUDNAIR_GOOGLE.value, cloudnair_events),
-        (Source.SAMSUNG.value, samsung_events),
-        (Source.TSMC.value, tsmc_events),
-        (Source.NVIDIA.value, nvidia_events),
-        (Source.GITHUB.value, github_events),
-        (Source.SNOWFLAKE.value, snowflake_events),
-    )
-    DataManager.save_data(events)
+    fetchers = get_fetchers(delta_days, sources)
+    if not force and sources is None:
+        due = RefreshScheduler.load().due([source for source, _ in fetchers])
+        fetchers = [(source, fetch) for source, fetch in fetchers if source in due]
+        logging.info(f"Sources due: {[source.value for source in due]}")
+
+    results = fetch_sources(fetchers, DataManager.new_snapshot(), progress)
+    with RefreshScheduler.updating() as scheduler:
+        for source, events in results.events.items():
+            scheduler.record(source, events)
+        for source in results.failed:
+            scheduler.defer(source)
+
+    build_search_index()
+    PayloadArchive.prune()
+
+
+class FetchResults(NamedTuple):
+    events: dict[Source, list[dict[str, Any]]]
+    # Error of every source that failed, its last good partition is kept
+    failed: dict[Source, str]
+
+
+def fetch_sources(
+    fetchers: list[tuple[Source, Fetcher]],
+    snapshot: str,
+    progress: Optional[ProgressCallback] = None,
+) -> FetchResults:
+    """
+        Downloads sources one by one while their payloads are parsed on the parse pool,
+        committing each source to its partition of `snapshot` as soon as it is parsed.
+        Payloads are archived by content hash, an unchanged payload is not parsed again.
+
+        Every source runs in isolation: a failure is recorded and the source keeps its
+        last good partition, marked stale, while the other sources carry on.
+        The costliest sources are downloaded first, their parse overlaps the cheap ones.
+    """
+    # archive imports DataManager from this module
+    from archive import PayloadArchive
+    fetchers = sorted(fetchers, key=lambda item: SERVICES[item[0]].cost, reverse=True)
+    if progress:
+        for source, _ in fetchers:
+            progress(source.value, 'pending', 0)
+
+    results = FetchResults({}, {})
+    cache_hits = set()
+    started: dict[Source, float] = {}
+
+    def record(source: Source, state: str, events: int, error: Optional[str] = None) -> None:
+        DataManager.record_run({
+            'source': source.value,
+            'snapshot': snapshot,
+            'state': state,
+            'duration': round(time.monotonic() - started[source], 3),
+            'events': events,
+            'error': error,
+        })
+        if progress:
+            progress(source.value, state, events)
+
+    def fail(source: Source, exc: Exception) -> None:
+        logging.error(f"[FAILED] {source.value}, keeping its last good events")
+        logging.error(exc, exc_info=exc)
+        results.failed[source] = repr(exc)
+        DataManager.mark_stale(source.value, repr(exc))
+        record(source, 'failed', 0, repr(exc))
+
+    def submit(source: Source, digest: str, parse: Optional[Callable], payload: Any) -> ParseJob:
+        pool = get_parse_pool()
+        try:
+            future = pool.submit(parse_source, source.value, parse, payload)
+        except BrokenProcessPool:
+            pool = replace_parse_pool(pool)
+            future = pool.submit(parse_source, source.value, parse, payload)
+        return ParseJob(source, digest, future, pool, parse, payload)
+
+    def commit(job: ParseJob) -> None:
+        source, digest = job.source, job.digest
+        try:
+            try:
+                source_events = job.future.result()
+            except BrokenProcessPool:
+                if job.pool is None:
+                    raise
+                # The worker died, parsing this payload or another one, retried once
+                pool = replace_parse_pool(job.pool)
+                source_events = pool.submit(
+                    parse_source, source.value, job.parse, job.payload).result()
+            if digest not in cache_hits:
+                PayloadArchive.save_parsed(source.value, digest, source_events)
+            DataManager.save_partition(snapshot, source.value, source_events, payload=digest)
+        except Exception as exc:
+            fail(source, exc)
+            return
+        results.events[source] = source_events
+        record(source, 'done', len(source_events))
+
+    pending: list[ParseJob] = []
+    for source, fetch in fetchers:
+        if progress:
+            progress(source.value, 'running', 0)
+        started[source] = time.monotonic()
+        try:
+            if isinstance(fetch, SplitFetcher):
+                parse, payload = fetch.parse, fetch.download()
+            else:
+                parse, payload = None, fetch()
+
+            digest = PayloadArchive.store(payload)
+            parsed = PayloadArchive.load_parsed(source.value, digest)
+            if parsed is None:
+                job = submit(source, digest, parse, payload)
+            else:
+                logging.info(f"{source.value} payload unchanged, parse skipped")
+                cache_hits.add(digest)
+                future: Future = Future()
+                future.set_result(parsed)
+                job = ParseJob(source, digest, future)
+        except Exception as exc:
+            fail(source, exc)
+            continue
+        pending.append(job)
+
+        for job in [job for job in pending if job.future.done()]:
+            pending.remove(job)
+            commit(job)
+
+    for job in pending:
+        commit(job)
+    return results
+
+
+class ParseJob(NamedTuple):
+    source: Source
+    digest: str
+    future: Future
+    # Pool the parse was submitted to and its input, None for a reused parse
+    pool: Optional[ProcessPoolExecutor] = None
+    parse: Optional[Callable[[Any], list[dict[str, Any]]]] = None
+    payload: Any = None
+
+
+def parse_source(
+    source: str,
+    parse: Optional[Callable[[Any], list[dict[str, Any]]]],
+    payload: Any,
+) -> list[UnifiedEvent]:
+    """Parse stage of one source, run on the parse pool."""
+    events = parse(payload) if parse else payload
+    return transform_events((source, events))
+
+
+def build_search_index() -> None:
+    # search imports DataManager from this module
+    from search import SearchIndex
+    data = DataManager.load_latest_data()
+    if data:
+        SearchIndex.build(data['date'], data['events'])
 
 
 def transform_events(
     *event_groups: tuple[str, list[dict[str, Collection[str]]]],
-) -> list[dict[str, str | None]]:
+) -> list[UnifiedEvent]:
     schema_map: Dict[str, List[Transformer]] = {
         "id": ["id", "uuid", "type._id", "_id"],
         "title": ["title", "name"],
@@ -195,7 +431,7 @@ def transform_to_unified_schema(
     input_dict: Dict[str, Any],
     source: str,
     schema_map: Dict[str, List[Transformer]],
-) -> Dict[str, Any]:
+) -> UnifiedEvent:
     output_dict = {"source": source}
 
     for unified_key, transformers in schema_map.items():
@@ -216,7 +452,7 @@ def transform_to_unified_schema(
 
         output_dict[unified_key] = values[0] if values else None
 
-    return output_dict
+    return UnifiedEvent.from_dict(output_dict)
 
 
 def get_value(input_dict: dict[str, Any], query: str) -> Any:
@@ -235,41 +471,22 @@ def get_value(input_dict: dict[str, Any], query: str) -> Any:
         return jmespath.search(query.strip(), input_dict)
 
 
-class DataManager:
-    DATA_DIRECTORY = "data"
-
-    @classmethod
-    def save_data(cls, events: list[dict[str, str | None]]) -> None:
-        os.makedirs(cls.DATA_DIRECTORY, exist_ok=True)
-
-        date_str = datetime.now().strftime('%Y_%m_%d_%H.%M')
-        filename = os.path.join(cls.DATA_DIRECTORY, f'data_{date_str}.json')
-
-        data = {
-            'date': datetime.now().isoformat(),
-            'events': events,
-        }
-
-        with open(filename, 'w') as f:
-            json.dump(data, f)
-        logging.info(f"Data saved in file: {filename}")
-
-    @classmethod
-    def load_latest_data(cls) -> Any:
-        files = glob.glob(f'{cls.DATA_DIRECTORY}/data_*.json')
-        if not files:
-            return {}
-
-        latest_file = max(files, key=os.path.getctime)
-        with open(latest_file, 'r') as f:
-            data = json.load(f)
+if __name__ == '__main__':
+    import argparse
 
-        logging.info(f"Data loaded from file: {latest_file}")
-        return data
+    from prettytable import PrettyTable
 
+    parser = argparse.ArgumentParser(description="Fetch the events of every source.")
+    parser.add_argument('--sources', help="Comma separated sources to refresh, e.g. meetup,gcd")
+    parser.add_argument('--delta-days', type=int, default=1)
+    parser.add_argument('--force', action='store_true', help="Refresh sources not due yet")
+    args = parser.parse_args()
 
-if __name__ == '__main__':
-    main(delta_days=1)
+    try:
+        selected = select_sources(args.sources.split(',')) if args.sources else None
+    except ValueError as exc:
+        parser.error(str(exc))
+    main(delta_days=args.delta_days, force=args.force, sources=selected)
 
     data = DataManager.load_latest_data()
     table = PrettyTable()
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Final, Iterable, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from event import json_default
+
+TAG_RE = re.compile(r'<[^>]+>')
+DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+# Content lines are folded at 75 octets (RFC 5545, 3.1)
+LINE_LIMIT: Final = 75
+MAX_FEEDS: Final = 32
+
+HEADER: Final = (
+    'BEGIN:VCALENDAR\r\n'
+    'VERSION:2.0\r\n'
+    'PRODID:-//events_feed//EN\r\n'
+    'CALSCALE:GREGORIAN\r\n'
+    'X-WR-CALNAME:Events Feed\r\n'
+)
+FOOTER: Final = 'END:VCALENDAR\r\n'
+
+FeedKey = tuple[str, tuple[str, ...], Optional[int]]
+
+
+class ICalendarFeed:
+    """
+        iCalendar export of the unified events, one feed per (snapshot, sources, min_going).
+
+        Rendered feeds are kept with their ETag, so repeated polls only compare tags.
+        VEVENT blocks are cached by event content across snapshots: when a new snapshot
+        arrives only the events that changed are rendered again, blocks of events that
+        disappeared are dropped with the previous snapshot.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._feeds: OrderedDict[FeedKey, tuple[bytes, str]] = OrderedDict()
+        self._version: Optional[str] = None
+        self._vevents: dict[str, str] = {}
+        self._previous_vevents: dict[str, str] = {}
+
+    def cached_etag(self, key: FeedKey) -> Optional[str]:
+        with self._lock:
+            feed = self._feeds.get(key)
+            return feed[1] if feed else None
+
+    def render(
+        self,
+        key: FeedKey,
+        events: Iterable[dict[str, Any]],
+        stamp: Optional[str],
+    ) -> tuple[bytes, str]:
+        with self._lock:
+            if key in self._feeds:
+                self._feeds.move_to_end(key)
+                return self._feeds[key]
+
+            version = key[0]
+            if version != self._version:
+                self._version = version
+                self._previous_vevents, self._vevents = self._vevents, {}
+            dtstamp = format_datetime(to_utc(stamp) or datetime.now(timezone.utc))
+
+            blocks = [HEADER]
+            for event in events:
+                digest = event_digest(event)
+                block = self._vevents.get(digest) or self._previous_vevents.get(digest)
+                if block is None:
+                    block = render_vevent(event, dtstamp)
+                self._vevents[digest] = block
+                blocks.append(block)
+            blocks.append(FOOTER)
+
+            body = ''.join(blocks).encode()
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            self._feeds[key] = (body, etag)
+            if len(self._feeds) > MAX_FEEDS:
+                self._feeds.popitem(last=False)
+            return body, etag
+
+
+def render_vevent(event: dict[str, Any], dtstamp: str) -> str:
+    """
+        VEVENT block of one event, stamped with the snapshot its content first appeared in.
+        Empty for events without a start date, DTSTART is required in a VEVENT.
+    """
+    dates = date_properties(event)
+    if not dates:
+        return ''
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{escape(event_uid(event))}@events-feed',
+        f'DTSTAMP:{dtstamp}',
+    ]
+    lines += dates
+    lines.append(f"SUMMARY:{escape(event.get('title') or '')}")
+
+    description = TAG_RE.sub(' ', event.get('description') or '').strip()
+    if event.get('going') is not None:
+        description = f"Going: {event['going']}\n{description}".strip()
+    if description:
+        lines.append(f'DESCRIPTION:{escape(description)}')
+    if event.get('event_url'):
+        lines.append(f"URL:{event['event_url']}")
+    lines.append(f"CATEGORIES:{escape(event.get('source') or '')}")
+    lines.append('END:VEVENT')
+    return ''.join(f'{fold(line)}\r\n' for line in lines)
+
+
+def event_uid(event: Mapping[str, Any]) -> str:
+    """
+        Same for every version of an event, so calendar clients update it in place:
+        the source id, else its URL, else its title and start.
+    """
+    key = event.get('id')
+    if not key:
+        stable = event.get('event_url') or f"{event.get('title')}@{event.get('start_time')}"
+        key = hashlib.sha1(stable.encode()).hexdigest()
+    return f"{event.get('source')}-{key}"
+
+
+def date_properties(event: Mapping[str, Any]) -> list[str]:
+    """
+        DTSTART and DTEND of one value type, dates when the start is date-only.
+        Upstream end dates are the last day, DTEND is exclusive (RFC 5545, 3.6.1).
+    """
+    start, end, tz = event.get('start_time'), event.get('end_time'), event.get('timezone')
+    if is_date(start):
+        lines = [f"DTSTART;VALUE=DATE:{start.replace('-', '')}"]
+        last_day = to_date(end)
+        if last_day and last_day >= date.fromisoformat(start):
+            lines.append(f"DTEND;VALUE=DATE:{last_day + timedelta(days=1):%Y%m%d}")
+        return lines
+
+    parsed_start = to_utc(start, tz)
+    if parsed_start is None:
+        return []
+    lines = [f'DTSTART:{format_datetime(parsed_start)}']
+    if is_date(end):
+        # Midnight after the last day, in the timezone of the event
+        end = (date.fromisoformat(end) + timedelta(days=1)).isoformat()
+    parsed_end = to_utc(end, tz)
+    if parsed_end:
+        lines.append(f'DTEND:{format_datetime(parsed_end)}')
+    return lines
+
+
+def is_date(value: Any) -> bool:
+    return isinstance(value, str) and bool(DATE_RE.match(value))
+
+
+def to_date(value: Any) -> Optional[date]:
+    """Calendar date of a date or a time, in the offset it is written in."""
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).date()
+    except ValueError:
+        return None
+
+
+def to_utc(value: Any, tz: Any = None) -> Optional[datetime]:
+    """Naive times are local to the event timezone when known, UTC otherwise."""
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=zone(tz))
+    return parsed.astimezone(timezone.utc)
+
+
+def zone(tz: Any) -> Any:
+    if isinstance(tz, str) and tz:
+        try:
+            return ZoneInfo(tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return timezone.utc
+
+
+def format_datetime(value: datetime) -> str:
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+
+def escape(text: str) -> str:
+    return (
+        text.replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def fold(line: str) -> str:
+    encoded = line.encode()
+    if len(encoded) <= LINE_LIMIT:
+        return line
+
+    parts, start, limit = [], 0, LINE_LIMIT
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Never split a multi-byte character
+        while end < len(encoded) and encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode())
+        start, limit = end, LINE_LIMIT - 1
+    return '\r\n '.join(parts)
+
+
+def event_digest(event: Mapping[str, Any]) -> str:
+    content = json.dumps(event, sort_keys=True, default=json_default)
+    return hashlib.sha1(content.encode()).hexdigest()
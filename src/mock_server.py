@@ -0,0 +1,284 @@
+import argparse
+import glob
+import json
+import logging
+import mimetypes
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Final, NamedTuple, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+import services
+from fetch import setup_logging
+
+FIXTURES_DIRECTORY: Final = 'mock_data'
+# Fixture file names that are not the lowercased constant name without `_URL`
+FIXTURE_NAMES: Final = {'C2CGLOBAL_URL': 'c2c_global'}
+# Query, form or JSON body parameters that select a page or a cursor of an upstream
+PAGE_PARAMETERS: Final = ('page', '$start', 'wpx_paging', 'after')
+# Page values of a first request, answered with the fixture of the route itself
+FIRST_PAGES: Final = {'', '0', '1'}
+# Page number appended to the path, `~2` on Eventyco
+PATH_PAGE_RE = re.compile(r'~(\d+)$')
+# Bytes written between two bandwidth pauses
+CHUNK_SIZE: Final = 16 * 1024
+
+
+class HostProfile(NamedTuple):
+    # Seconds before the response starts, spread uniformly by +/- jitter
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Share of requests answered with 503
+    error_rate: float = 0.0
+    # Bytes per second of the response body, 0 for unlimited
+    bandwidth: float = 0.0
+
+
+class Route(NamedTuple):
+    host: str
+    path: str
+    fixture: str
+
+
+class MockUpstream:
+    """
+        Recorded responses of every upstream of services.py, served under /<host>/<path>.
+
+        A request is routed to the `*_URL` constant with the longest matching path on its
+        host and answered with the fixture of that constant, `<fixture>.<ext>`. Requests
+        for a later page or cursor get `<fixture>~<page>.<ext>`, and an empty last page
+        when that page was not recorded, so paginated clients stop. With `record`,
+        a missing fixture is fetched once from the real host and its response saved.
+    """
+
+    def __init__(
+        self,
+        fixtures_directory: str = FIXTURES_DIRECTORY,
+        profiles: Optional[dict[str, HostProfile]] = None,
+        default_profile: HostProfile = HostProfile(),
+        record: bool = False,
+    ) -> None:
+        self.fixtures_directory = fixtures_directory
+        self.profiles = profiles or {}
+        self.default_profile = default_profile
+        self.record = record
+        self.routes = upstream_routes()
+        self._lock = threading.Lock()
+        self._fixtures: dict[str, tuple[bytes, str]] = {}
+
+    def resolve(self, path: str) -> Optional[Route]:
+        host = path.lstrip('/').split('/', 1)[0]
+        matches = [
+            route for route in self.routes
+            if route.host == host and path.startswith(f'/{host}{route.path}')
+        ]
+        return max(matches, key=lambda route: len(route.path), default=None)
+
+    def profile(self, host: str) -> HostProfile:
+        return self.profiles.get(host, self.default_profile)
+
+    def fixture(self, route: Route, page: str = '') -> Optional[tuple[bytes, str]]:
+        """Body and content type of the fixture of `route` and `page`, None when not recorded."""
+        name = fixture_name(route, page)
+        with self._lock:
+            if name not in self._fixtures:
+                files = glob.glob(os.path.join(self.fixtures_directory, f'{glob.escape(name)}.*'))
+                if not files:
+                    return None
+                with open(files[0], 'rb') as f:
+                    content_type = mimetypes.guess_type(files[0])[0] or 'text/plain'
+                    # Fixtures are saved as UTF-8, requests reads text without a charset as Latin-1
+                    self._fixtures[name] = (f.read(), f'{content_type}; charset=utf-8')
+            return self._fixtures[name]
+
+    def last_page(self, route: Route) -> tuple[bytes, str]:
+        """Empty body in the content type of the route, past the last recorded page."""
+        first_page = self.fixture(route)
+        return b'', first_page[1] if first_page else 'text/plain'
+
+    def record_fixture(
+        self,
+        route: Route,
+        page: str,
+        response: requests.Response,
+    ) -> tuple[bytes, str]:
+        name = fixture_name(route, page)
+        content_type = response.headers.get('Content-Type', 'text/plain')
+        extension = mimetypes.guess_extension(content_type.split(';')[0]) or '.txt'
+        filename = os.path.join(self.fixtures_directory, f'{name}{extension}')
+        os.makedirs(self.fixtures_directory, exist_ok=True)
+        with open(filename, 'wb') as f:
+            f.write(response.content)
+        logging.info(f"Recorded {route.host}{route.path} in {filename}")
+        with self._lock:
+            self._fixtures[name] = (response.content, content_type)
+        return self._fixtures[name]
+
+    def missing(self) -> list[Route]:
+        return [route for route in self.routes if self.fixture(route) is None]
+
+
+def request_page(path: str, query: str, body: bytes) -> str:
+    """
+        Page or cursor a request asks for, from PAGE_PARAMETERS in its query, JSON or form
+        body, or a page number at the end of its path. Empty when it names none.
+    """
+    params = parse_qs(query)
+    try:
+        document = json.loads(body) if body else None
+    except ValueError:
+        document = None
+        params.update(parse_qs(body.decode(errors='replace')))
+
+    for name in PAGE_PARAMETERS:
+        # Numbers only, some APIs take the URL of the embedding page as `page`
+        value = params.get(name, [''])[-1]
+        if value.isdigit() or (name == 'after' and value):
+            return value
+    value = find_parameter(document)
+    if value:
+        return value
+    match = PATH_PAGE_RE.search(path)
+    return match.group(1) if match else ''
+
+
+def find_parameter(document: Any) -> str:
+    """First PAGE_PARAMETERS value in a JSON document, at any depth."""
+    if isinstance(document, dict):
+        for name in PAGE_PARAMETERS:
+            if isinstance(document.get(name), (int, str)) and str(document[name]):
+                return str(document[name])
+        documents = list(document.values())
+    elif isinstance(document, list):
+        documents = document
+    else:
+        return ''
+    for value in documents:
+        found = find_parameter(value)
+        if found:
+            return found
+    return ''
+
+
+def fixture_name(route: Route, page: str) -> str:
+    if page in FIRST_PAGES:
+        return route.fixture
+    # Cursors are opaque strings, kept to file name characters
+    return f"{route.fixture}~{re.sub(r'[^A-Za-z0-9_-]', '_', page)}"
+
+
+def upstream_routes() -> list[Route]:
+    routes = []
+    for name, url in vars(services).items():
+        if not name.endswith('_URL') or not isinstance(url, str):
+            continue
+        parts = urlsplit(url)
+        # Constants already pointing at a mock server carry the upstream host in their path
+        path = parts.path if services.BASE_URL_OVERRIDE else f'/{parts.netloc}{parts.path}'
+        host, _, rest = path.lstrip('/').partition('/')
+        routes.append(Route(host, f'/{rest}', FIXTURE_NAMES.get(name, name[:-4].lower())))
+    return routes
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    upstream = MockUpstream()
+
+    def do_GET(self) -> None:
+        self.respond()
+
+    def do_POST(self) -> None:
+        self.respond()
+
+    def respond(self) -> None:
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        url = urlsplit(self.path)
+        route = self.upstream.resolve(url.path)
+        if route is None:
+            self.send_body(404, b'Unknown upstream', 'text/plain')
+            return
+
+        profile = self.upstream.profile(route.host)
+        time.sleep(max(profile.latency + random.uniform(-profile.jitter, profile.jitter), 0))
+        if random.random() < profile.error_rate:
+            self.send_body(503, b'Injected error', 'text/plain')
+            return
+
+        page = request_page(url.path, url.query, body)
+        fixture = self.upstream.fixture(route, page)
+        if fixture is None and self.upstream.record:
+            fixture = self.upstream.record_fixture(route, page, self.fetch_upstream(body))
+        if fixture is None and page not in FIRST_PAGES:
+            fixture = self.upstream.last_page(route)
+        if fixture is None:
+            self.send_body(404, f'No fixture {route.fixture}'.encode(), 'text/plain')
+            return
+        self.send_body(200, *fixture, bandwidth=profile.bandwidth)
+
+    def fetch_upstream(self, body: bytes) -> requests.Response:
+        headers = {
+            key: value for key, value in self.headers.items()
+            if key.lower() not in ('host', 'content-length', 'accept-encoding')
+        }
+        url = f"https://{self.path.lstrip('/')}"
+        response = requests.request(self.command, url, headers=headers, data=body or None)
+        response.raise_for_status()
+        return response
+
+    def send_body(self, status: int, body: bytes, content_type: str, bandwidth: float = 0) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        for start in range(0, len(body), CHUNK_SIZE):
+            chunk = body[start:start + CHUNK_SIZE]
+            self.wfile.write(chunk)
+            if bandwidth:
+                time.sleep(len(chunk) / bandwidth)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.info(f"Mock {format % args}")
+
+
+def load_profiles(filename: Optional[str]) -> dict[str, HostProfile]:
+    """Per-host profiles from a JSON object of host to HostProfile fields."""
+    if not filename:
+        return {}
+    with open(filename, 'r') as f:
+        return {host: HostProfile(**profile) for host, profile in json.load(f).items()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve recorded upstream responses locally.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--fixtures', default=FIXTURES_DIRECTORY)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds, every host")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Seconds, every host")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="0..1, every host")
+    parser.add_argument('--bandwidth', type=float, default=0.0, help="Bytes/s, every host")
+    parser.add_argument('--profiles', help="JSON file of per-host profiles")
+    parser.add_argument('--record', action='store_true', help="Record missing fixtures")
+    parser.add_argument('--seed', type=int, help="Seed of the jitter and injected errors")
+    args = parser.parse_args()
+
+    setup_logging()
+    random.seed(args.seed)
+    MockHandler.upstream = MockUpstream(
+        args.fixtures,
+        load_profiles(args.profiles),
+        HostProfile(args.latency, args.jitter, args.error_rate, args.bandwidth),
+        args.record,
+    )
+    for route in MockHandler.upstream.missing():
+        logging.warning(f"No fixture {route.fixture} for {route.host}{route.path}")
+
+    server = ThreadingHTTPServer((args.host, args.port), MockHandler)
+    logging.info(f"Mock upstreams on http://{args.host}:{args.port}, run the fetch with "
+                 f"EVENTS_FEED_BASE_URL=http://{args.host}:{args.port}")
+    server.serve_forever()
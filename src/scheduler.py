@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import random
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Final, Optional
+
+from fetch import Source
+from storage import DataManager, write_json
+
+DEFAULT_TTL: Final = timedelta(hours=6)
+INITIAL_TTLS: Final = {
+    Source.MEETUP: timedelta(minutes=30),
+    Source.EVENTBRITE: timedelta(minutes=30),
+    Source.GCD: timedelta(hours=2),
+    Source.C2CGLOBAL: timedelta(hours=2),
+    Source.BLOOMBERG: timedelta(days=1),
+    Source.SAMSUNG: timedelta(days=1),
+    Source.TSMC: timedelta(days=1),
+    Source.NVIDIA: timedelta(days=1),
+}
+MIN_TTL: Final = timedelta(minutes=15)
+MAX_TTL: Final = timedelta(days=7)
+# Number of recent runs the change rate is computed from
+HISTORY_SIZE: Final = 8
+# Relative spread of every TTL, so sources do not stay aligned on the same tick
+JITTER: Final = 0.1
+
+
+class RefreshScheduler:
+    """
+        Per-source TTLs adapted to how often the source payload actually changes.
+
+        A source whose events changed in most recent runs gets its TTL halved, one that
+        rarely changes gets it grown by half, within MIN_TTL..MAX_TTL. Sources that are not
+        due keep their partition from an earlier snapshot.
+    """
+    STATE_FILE = 'schedule.json'
+
+    def __init__(self, state: dict[str, Any]) -> None:
+        self.state = state
+
+    @classmethod
+    def load(cls) -> 'RefreshScheduler':
+        try:
+            with open(cls._filename(), 'r') as f:
+                return cls(json.load(f))
+        except (OSError, ValueError):
+            return cls({})
+
+    @classmethod
+    @contextmanager
+    def updating(cls) -> Iterator['RefreshScheduler']:
+        """
+            State reloaded under the schedule lock and saved when the block exits, so the
+            daemon and UI fetches record their runs without overwriting each other.
+        """
+        with DataManager.lock(cls.STATE_FILE):
+            scheduler = cls.load()
+            yield scheduler
+            scheduler.save()
+
+    def save(self) -> None:
+        write_json(self._filename(), self.state)
+
+    def due(self, sources: list[Source], now: Optional[datetime] = None) -> list[Source]:
+        now = now or datetime.now()
+        return [source for source in sources if self.next_run(source) <= now]
+
+    def next_run(self, source: Source) -> datetime:
+        source_state = self.state.get(source.value)
+        if source_state:
+            return datetime.fromisoformat(source_state['next_run'])
+
+        partition = DataManager.load_manifest().get('sources', {}).get(source.value)
+        if partition:
+            return datetime.fromisoformat(partition['date']) + self.ttl(source)
+        return datetime.min
+
+    def ttl(self, source: Source) -> timedelta:
+        source_state = self.state.get(source.value)
+        if source_state:
+            return timedelta(seconds=source_state['ttl'])
+        return INITIAL_TTLS.get(source, DEFAULT_TTL)
+
+    def record(
+        self,
+        source: Source,
+        events: list[dict[str, Any]],
+        now: Optional[datetime] = None,
+    ) -> None:
+        now = now or datetime.now()
+        source_state = self.state.get(source.value, {})
+        digest = events_digest(events)
+        history = source_state.get('history', [])
+        if 'digest' in source_state:
+            history = (history + [digest != source_state['digest']])[-HISTORY_SIZE:]
+
+        ttl = self.ttl(source)
+        if history:
+            change_rate = sum(history) / len(history)
+            if change_rate >= 0.5:
+                ttl /= 2
+            elif change_rate < 0.25:
+                ttl *= 1.5
+        ttl = min(max(ttl, MIN_TTL), MAX_TTL)
+
+        self.state[source.value] = {
+            'ttl': ttl.total_seconds(),
+            'digest': digest,
+            'history': history,
+            'last_run': now.isoformat(),
+            'next_run': (now + jittered(ttl)).isoformat(),
+        }
+
+    def defer(self, source: Source, now: Optional[datetime] = None) -> None:
+        """Retries a failed source after its TTL, without counting the run."""
+        now = now or datetime.now()
+        ttl = self.ttl(source)
+        source_state = self.state.setdefault(source.value, {'ttl': ttl.total_seconds()})
+        source_state['next_run'] = (now + jittered(ttl)).isoformat()
+
+    @classmethod
+    def _filename(cls) -> str:
+        return os.path.join(DataManager.DATA_DIRECTORY, cls.STATE_FILE)
+
+
+def jittered(ttl: timedelta) -> timedelta:
+    return ttl * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+def events_digest(events: list[dict[str, Any]]) -> str:
+    # Many scrapers generate a random id on every run, it is not part of the content
+    content = [{key: value for key, value in event.items() if key != 'id'} for event in events]
+    return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
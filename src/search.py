@@ -0,0 +1,77 @@
+import logging
+import os
+import re
+import sqlite3
+import uuid
+from typing import Any, Optional
+
+from storage import DataManager
+
+TAG_RE = re.compile(r'<[^>]+>')
+TERM_RE = re.compile(r'\w+')
+
+
+class SearchIndex:
+    """
+        SQLite FTS5 index over event titles and descriptions.
+
+        One index is kept next to the data, tagged with the date of the snapshot it was
+        built from. Rows are keyed by the event position in `load_latest_data()['events']`.
+    """
+    INDEX_FILE = 'search_index.sqlite'
+
+    @classmethod
+    def build(cls, snapshot_date: str, events: list[dict[str, Any]]) -> None:
+        filename = cls._filename()
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        # Unique name, sessions of the UI may build the same index concurrently
+        tmp_filename = f'{filename}.{uuid.uuid4().hex}.tmp'
+
+        with sqlite3.connect(tmp_filename) as conn:
+            conn.execute("CREATE TABLE snapshot (date TEXT)")
+            conn.execute("INSERT INTO snapshot VALUES (?)", (snapshot_date,))
+            conn.execute(
+                "CREATE VIRTUAL TABLE events USING fts5(title, description, prefix='2 3')")
+            conn.executemany(
+                "INSERT INTO events (rowid, title, description) VALUES (?, ?, ?)",
+                (
+                    (position, event.get('title') or '', cls._text(event.get('description')))
+                    for position, event in enumerate(events)
+                ),
+            )
+        conn.close()
+        os.replace(tmp_filename, filename)
+        logging.info(f"Search index built for {len(events)} events: {filename}")
+
+    @classmethod
+    def search(cls, snapshot_date: str, query: str) -> Optional[set[int]]:
+        """
+            Positions of events matching every term of `query` as a prefix,
+            None when there is no index for `snapshot_date`.
+        """
+        filename = cls._filename()
+        if not os.path.exists(filename):
+            return None
+
+        conn = sqlite3.connect(f'file:{filename}?mode=ro', uri=True)
+        try:
+            row = conn.execute("SELECT date FROM snapshot").fetchone()
+            if row is None or row[0] != snapshot_date:
+                return None
+
+            terms = TERM_RE.findall(query)
+            if not terms:
+                return set()
+            match = ' '.join(f'"{term}"*' for term in terms)
+            rows = conn.execute("SELECT rowid FROM events WHERE events MATCH ?", (match,))
+            return {rowid for rowid, in rows}
+        finally:
+            conn.close()
+
+    @classmethod
+    def _filename(cls) -> str:
+        return os.path.join(DataManager.DATA_DIRECTORY, cls.INDEX_FILE)
+
+    @staticmethod
+    def _text(value: Any) -> str:
+        return TAG_RE.sub(' ', value) if isinstance(value, str) else ''
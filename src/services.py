@@ -1,13 +1,19 @@
 import json
 import logging
+import math
+import os
 import re
 import secrets
+import threading
 import time
 import uuid
-from collections.abc import Collection
+from collections.abc import Collection, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache, partial
 from typing import Any, Final, NamedTuple
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlparse, urlsplit, urlunsplit
 from zoneinfo import ZoneInfo
 
 import cloudscraper
@@ -18,41 +24,69 @@ from bs4 import BeautifulSoup
 from chompjs import parse_js_object
 from dateutil import parser
 
+from storage import DataManager, write_json
 from tz import whois_timezone_info
 
-EVENTBRITE_URL = 'https://www.eventbrite.com/api/v3/destination/search/'
-MEETUP_URL = 'https://www.meetup.com/gql2'
-CONF_TECH_URL = 'https://29flvjv5x9-dsn.algolia.net/1/indexes/*/queries'
-GDG_URL = 'https://gdg.community.dev/api/event/'
-C2CGLOBAL_URL = 'https://events.c2cglobal.com/api/search/'
-DATABRICKS_URL = 'https://www.databricks.com/en-website-assets/page-data/events/page-data.json'
-DATASTAX_URL = 'https://bbnkhnhl.apicdn.sanity.io/v2022-01-05/data/query/production'
-SCALA_LANG_URL = 'https://www.scala-lang.org/events/'
-CASSANDRA_URL = 'https://cassandra.apache.org/_/events.html'
-LINUX_FOUNDATION_URL = 'https://events.linuxfoundation.org/'
-WEAVIATE_URL = 'https://core.service.elfsight.com/p/boot/'
-REDIS_URL = 'https://redis.com/api/archive'
-POSTGRES_URL = 'https://www.postgresql.org/about/events/'
-HOPSWORKS_URL = 'https://www.hopsworks.ai/events'
-PYTHON_URL = 'https://www.python.org/events/'
-EVENTYCO_URL = (
+# Base URL of a local stand-in for every upstream, e.g. http://127.0.0.1:8600 (mock_server.py)
+BASE_URL_OVERRIDE: Final = os.environ.get('EVENTS_FEED_BASE_URL', '')
+
+
+def upstream_url(url: str, base: str = BASE_URL_OVERRIDE) -> str:
+    """`url`, or the same request sent to `base` with the upstream host as first path segment."""
+    if not base:
+        return url
+    parts = urlsplit(url)
+    path = f'/{parts.netloc}{parts.path}'
+    return urlunsplit(urlsplit(base)._replace(path=path, query=parts.query))
+
+
+def stable_id(key: str) -> str:
+    """Id of a scraped event, derived from what identifies it upstream so every parse agrees."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, key))
+
+
+EVENTBRITE_URL = upstream_url('https://www.eventbrite.com/api/v3/destination/search/')
+MEETUP_URL = upstream_url('https://www.meetup.com/gql2')
+CONF_TECH_URL = upstream_url('https://29flvjv5x9-dsn.algolia.net/1/indexes/*/queries')
+GDG_URL = upstream_url('https://gdg.community.dev/api/event/')
+C2CGLOBAL_URL = upstream_url('https://events.c2cglobal.com/api/search/')
+DATABRICKS_URL = upstream_url(
+    'https://www.databricks.com/en-website-assets/page-data/events/page-data.json')
+DATASTAX_URL = upstream_url('https://bbnkhnhl.apicdn.sanity.io/v2022-01-05/data/query/production')
+SCALA_LANG_URL = upstream_url('https://www.scala-lang.org/events/')
+CASSANDRA_URL = upstream_url('https://cassandra.apache.org/_/events.html')
+LINUX_FOUNDATION_URL = upstream_url('https://events.linuxfoundation.org/')
+WEAVIATE_URL = upstream_url('https://core.service.elfsight.com/p/boot/')
+REDIS_URL = upstream_url('https://redis.com/api/archive')
+POSTGRES_URL = upstream_url('https://www.postgresql.org/about/events/')
+HOPSWORKS_URL = upstream_url('https://www.hopsworks.ai/events')
+PYTHON_URL = upstream_url('https://www.python.org/events/')
+EVENTYCO_URL = upstream_url(
     'https://www.eventyco.com/events/conferences'
     '/tech~scala~elixir~data~devops~sre~security~rust~kafka~golang'
 )
-DBT_URL = 'https://www.getdbt.com/events'
-DEV_EVENTS_URL = 'https://dev.events/'
-TECH_CRUNCH_URL = 'https://techcrunch.com/wp-json/wp/v2/tc_events'
-TECH_MEME_URL = 'https://www.techmeme.com/events'
-BLOOMBERG_URL = 'https://www.bloomberglive.com/calendar/'
-CLOUDNAIR_GOOGLE_URL = 'https://cloudonair.withgoogle.com/api/events?collection=6ce82b&order=asc&state=FUTURE&page=1&shallow=true'  # noqa: E501
-COHERE_URL = 'https://cohere.com/events'
-SAMSUNG_URL = 'https://www.samsung.com/global/ir/ir-events-presentations/events/'
-TSMC_URL = 'https://pr.tsmc.com/english/events/tsmc-events'
-NVIDIA_URL = 'https://www.nvidia.com/content/dam/en-zz/Solutions/about-nvidia/calendar/en-us.json'
-GITHUB_URL = 'https://github.com/events'
-SNOWFLAKE_URL = 'https://www.snowflake.com/about/events/'
+DBT_URL = upstream_url('https://www.getdbt.com/events')
+DEV_EVENTS_URL = upstream_url('https://dev.events/')
+TECH_CRUNCH_URL = upstream_url('https://techcrunch.com/wp-json/wp/v2/tc_events')
+TECH_MEME_URL = upstream_url('https://www.techmeme.com/events')
+BLOOMBERG_URL = upstream_url('https://www.bloomberglive.com/calendar/')
+CLOUDNAIR_GOOGLE_URL = upstream_url('https://cloudonair.withgoogle.com/api/events?collection=6ce82b&order=asc&state=FUTURE&page=1&shallow=true')  # noqa: E501
+COHERE_URL = upstream_url('https://cohere.com/events')
+SAMSUNG_URL = upstream_url('https://www.samsung.com/global/ir/ir-events-presentations/events/')
+TSMC_URL = upstream_url('https://pr.tsmc.com/english/events/tsmc-events')
+NVIDIA_URL = upstream_url(
+    'https://www.nvidia.com/content/dam/en-zz/Solutions/about-nvidia/calendar/en-us.json')
+GITHUB_URL = upstream_url('https://github.com/events')
+SNOWFLAKE_URL = upstream_url('https://www.snowflake.com/about/events/')
 
 EB_THRESHOLD = 15
+# Concurrent page requests of the paginated APIs
+PAGE_WORKERS = 4
+DATASTAX_PAGE_SIZE = 24
+DATASTAX_FILTER = (
+    '_type == "event" && contentHidden != true && !(_id in path("drafts.**")) '
+    '&& count((dates[].date)[@ >= $from && @ <= $to]) > 0'
+)
 MEETUP_PAGE_SIZE = 50
 UA_HINTS = {
     'sec-ch-ua': '"Google Chrome";v="113", "Chromium";v="113", "Not-A.Brand";v="24"',
@@ -72,6 +106,10 @@ ACCEPT_HEADERS = {
 }
 
 
+def compact_json(data: Any) -> str:
+    return json.dumps(data, separators=(',', ':'))
+
+
 class Location(NamedTuple):
     name: str
     lat: float
@@ -107,13 +145,166 @@ LOCATIONS: Final = [
 ]
 
 
+class ScraperPool:
+    """
+        cloudscraper sessions reused across fetches, one per host.
+
+        Solving the anti-bot challenge is the slowest request of a run, so the clearance
+        cookies of every host are persisted with the user agent they were issued for
+        until they expire, and sessions of later processes start already cleared.
+    """
+    COOKIES_FILE = 'scraper_cookies.json'
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sessions: dict[str, Any] = {}
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        host = urlparse(url).hostname or ''
+        scraper = self.session(host)
+        response = scraper.get(url, **kwargs)
+        self.save(host, scraper)
+        return response
+
+    def session(self, host: str) -> Any:
+        with self._lock:
+            if host not in self._sessions:
+                self._sessions[host] = self._restore(host)
+            return self._sessions[host]
+
+    def save(self, host: str, scraper: Any) -> None:
+        now = time.time()
+        cookies = [
+            {
+                'name': cookie.name,
+                'value': cookie.value,
+                'domain': cookie.domain,
+                'path': cookie.path,
+                'expires': cookie.expires,
+                'secure': cookie.secure,
+            }
+            # Session cookies die with the session, only persistent ones are kept
+            for cookie in scraper.cookies
+            if cookie.expires and cookie.expires > now
+        ]
+        with self._lock:
+            state = self._load()
+            state[host] = {'user_agent': scraper.headers['User-Agent'], 'cookies': cookies}
+            write_json(self._filename(), state)
+
+    def _restore(self, host: str) -> Any:
+        scraper = cloudscraper.create_scraper()
+        saved = self._load().get(host)
+        if not saved:
+            return scraper
+
+        now = time.time()
+        cookies = [cookie for cookie in saved['cookies'] if cookie['expires'] > now]
+        if cookies:
+            # Clearance is bound to the user agent that solved the challenge
+            scraper.headers['User-Agent'] = saved['user_agent']
+            for cookie in cookies:
+                scraper.cookies.set(**cookie)
+            logging.info(f"Reusing {len(cookies)} clearance cookies for {host}")
+        return scraper
+
+    def _load(self) -> dict[str, Any]:
+        try:
+            with open(self._filename(), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @classmethod
+    def _filename(cls) -> str:
+        return os.path.join(DataManager.DATA_DIRECTORY, cls.COOKIES_FILE)
+
+
+SCRAPERS: Final = ScraperPool()
+
+
+class MeetupCoveragePlanner:
+    """
+        Order and subset of `LOCATIONS` queried by MeetupService.
+
+        Online events are returned for many overlapping locations, so each run records
+        how many ids a location added on top of the locations queried before it, per
+        request. Locations are queried by decreasing yield and those that added nothing
+        in their last runs are skipped, except on a periodic full sweep that measures
+        every location again so coverage changes are picked up.
+    """
+    COVERAGE_FILE = 'meetup_coverage.json'
+    HISTORY_SIZE = 5
+    FULL_SWEEP_EVERY = 6
+
+    def __init__(self, state: dict[str, Any]) -> None:
+        self.state = state
+        self.state.setdefault('runs', 0)
+        self.state.setdefault('locations', {})
+
+    @classmethod
+    def load(cls) -> 'MeetupCoveragePlanner':
+        try:
+            with open(cls._filename(), 'r') as f:
+                return cls(json.load(f))
+        except (OSError, ValueError):
+            return cls({})
+
+    @classmethod
+    @contextmanager
+    def updating(cls) -> Iterator['MeetupCoveragePlanner']:
+        """
+            State reloaded under the coverage lock and saved when the block exits, so
+            concurrent Meetup fetches record their runs without overwriting each other.
+        """
+        with DataManager.lock(cls.COVERAGE_FILE):
+            planner = cls.load()
+            yield planner
+            planner.save()
+
+    def save(self) -> None:
+        self.state['runs'] += 1
+        write_json(self._filename(), self.state)
+
+    def plan(self, locations: list[Location]) -> list[Location]:
+        ordered = sorted(locations, key=self.yield_per_request, reverse=True)
+        if self.state['runs'] % self.FULL_SWEEP_EVERY == 0:
+            return ordered
+        return [location for location in ordered if self.is_productive(location)]
+
+    def record(self, location: Location, requests_count: int, new_ids: int) -> None:
+        history = self.state['locations'].setdefault(location.name, {'requests': [], 'new': []})
+        history['requests'] = (history['requests'] + [requests_count])[-self.HISTORY_SIZE:]
+        history['new'] = (history['new'] + [new_ids])[-self.HISTORY_SIZE:]
+
+    def yield_per_request(self, location: Location) -> float:
+        history = self.state['locations'].get(location.name)
+        if not history or not sum(history['requests']):
+            # Never measured, queried first
+            return float('inf')
+        return sum(history['new']) / sum(history['requests'])
+
+    def is_productive(self, location: Location) -> bool:
+        history = self.state['locations'].get(location.name)
+        return not history or len(history['new']) < self.HISTORY_SIZE or any(history['new'])
+
+    @classmethod
+    def _filename(cls) -> str:
+        return os.path.join(DataManager.DATA_DIRECTORY, cls.COVERAGE_FILE)
+
+
 class EventbriteService:
+    # Only the image expansion is read by the unified schema
+    EXPAND = ['image']
 
     def fetch_events(self, delta_days: int) -> list[dict[str, Any]]:
+        return self.parse(self.download(delta_days))
+
+    def download(self, delta_days: int) -> list[Any]:
         logging.info("Fetching Eventbrite Events")
         page = 1
         has_next_page = True
-        events = []
+        pages = []
         token = secrets.token_bytes(16).hex()
         page_count = -1
 
@@ -121,13 +312,16 @@ class EventbriteService:
             logging.info(f"EB Request start {page=} of {page_count=}")
             has_next_page, data = self._fetch_page(delta_days, page=page, token=token)
             if data:
-                events += data['events']['results']
+                pages.append(data)
                 page_count = data['events']['pagination']['page_count']
                 has_next_page = page_count > page
                 page += 1
 
         logging.info("Finished fetching EB events")
-        return events
+        return pages
+
+    def parse(self, pages: list[Any]) -> list[dict[str, Any]]:
+        return [event for data in pages for event in data['events']['results']]
 
     def _fetch_page(self, delta_days: int, page: int, token: str) -> tuple[bool, Any]:
         try:
@@ -195,15 +389,7 @@ class EventbriteService:
                     'request_source': 'web',
                 },
             },
-            'expand.destination_event': [
-                'primary_venue',
-                'image',
-                'ticket_availability',
-                'saves',
-                'event_sales_status',
-                'primary_organizer',
-                'public_collections',
-            ],
+            'expand.destination_event': self.EXPAND,
             'debug_experiment_overrides': {
                 'search_exp_4': 'A',
             },
@@ -213,15 +399,23 @@ class EventbriteService:
 class MeetupService:
 
     def fetch_events(self, delta_days: int) -> list[dict[str, Any]]:
-        logging.info("Fetching Meetup Events")
-        events = []
-        location_len = len(LOCATIONS)
+        return self.parse(self.download(delta_days))
 
-        for count, location in enumerate(LOCATIONS, start=1):
+    def download(self, delta_days: int) -> list[Any]:
+        logging.info("Fetching Meetup Events")
+        pages = []
+        locations = MeetupCoveragePlanner.load().plan(LOCATIONS)
+        location_len = len(locations)
+        logging.info(f"Meetup plan: {location_len}/{len(LOCATIONS)} locations")
+        seen_ids: set[str] = set()
+        measurements = []
+
+        for count, location in enumerate(locations, start=1):
             logging.info(f"Meetup Location start {count}/{location_len} {location=}")
             has_next_page = True
             cursor = ''
             page = 1
+            location_ids = set()
 
             while has_next_page:
                 logging.info(f"Meetup Request start {location.name=} {page=}")
@@ -232,10 +426,23 @@ class MeetupService:
                     cursor = data['data']['result']['pageInfo']['endCursor']
                     if cursor == '':
                         has_next_page = False
-                    events += [event['node'] for event in data['data']['result']['edges']]
+                    pages.append(data)
+                    edges = data['data']['result']['edges']
+                    location_ids.update(edge['node']['id'] for edge in edges)
                     page += 1
 
+            measurements.append((location, page - 1, len(location_ids - seen_ids)))
+            seen_ids |= location_ids
+
+        # Recorded on the latest state, the coverage file may have changed during the requests
+        with MeetupCoveragePlanner.updating() as planner:
+            for location, requests_count, new_ids in measurements:
+                planner.record(location, requests_count, new_ids)
         logging.info("Finished fetching Meetup events")
+        return pages
+
+    def parse(self, pages: list[Any]) -> list[dict[str, Any]]:
+        events = [event['node'] for data in pages for event in data['data']['result']['edges']]
         seen_ids = set()
         unique_data = []
 
@@ -318,15 +525,21 @@ class ConfTechService:
         Use algolia as backend.
         POST {Application-ID}.algolia.net/1/indexes/*/queries?GET_PARAMS
     """
+    PROJECTION = ['id', 'name', 'url', 'startDate', 'online']
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> Any:
         logging.info("Fetching Conf Tech Events")
         response = requests.post(
             f"{CONF_TECH_URL}?{self.get_query()}",
             headers=self.get_headers(),
             data=self.get_data(),
         )
-        data = response.json()
+        return response.json()
+
+    def parse(self, data: Any) -> list[dict[str, Any]]:
         return data['results'][0]['hits']
 
     def get_query(self) -> str:
@@ -352,11 +565,50 @@ class ConfTechService:
         }
 
     def get_data(self) -> str:
-        return (
-            '{"requests":[{"indexName":"prod_conferences","params":"facetFilters=%5B%5B%22topics%3Adevops%22%5D%5D&facets=%5B%22topics%22%2C%22continent%22%2C%22country%22%2C%22offersSignLanguageOrCC%22%5D'  # noqa: E501
-            f'&filters=startDateUnix%3E{time.time()}'
-            '&highlightPostTag=%3C%2Fais-highlight-0000000000%3E&highlightPreTag=%3Cais-highlight-0000000000%3E&hitsPerPage=600&maxValuesPerFacet=100&page=0&query=&tagFilters="}]}'  # noqa: E501
-        )
+        # No facets counts nor highlights, only the attributes read by the unified schema
+        params = urlencode({
+            'facetFilters': compact_json([['topics:devops']]),
+            'filters': f'startDateUnix>{time.time()}',
+            'attributesToRetrieve': compact_json(self.PROJECTION),
+            'attributesToHighlight': '[]',
+            'hitsPerPage': 600,
+            'page': 0,
+            'query': '',
+        })
+        return compact_json({'requests': [{'indexName': 'prod_conferences', 'params': params}]})
+
+
+class BevyClient:
+    """
+        Paginated bevy API behind GDG and C2C Global.
+
+        The first page gives the total `count` and the page size, the remaining pages
+        are then requested concurrently. Only the `fields` of the service are requested.
+    """
+
+    def __init__(self, url: str, headers: dict[str, str], fields: list[str]) -> None:
+        self.url = url
+        self.headers = headers
+        self.fields = fields
+
+    def fetch_pages(self, params: dict[str, str]) -> list[Any]:
+        params = {'fields': ','.join(self.fields), **params}
+        first_page = self._fetch_page(params, 1)
+        results = len(first_page['results'])
+        page_size = first_page.get('pagination', {}).get('page_size') or results
+        page_count = math.ceil(first_page.get('count', results) / page_size) if page_size else 1
+        if page_count <= 1:
+            return [first_page]
+
+        logging.info(f"Bevy {self.url} fetching {page_count} pages")
+        with ThreadPoolExecutor(min(PAGE_WORKERS, page_count - 1)) as executor:
+            pages = executor.map(partial(self._fetch_page, params), range(2, page_count + 1))
+            return [first_page, *pages]
+
+    def _fetch_page(self, params: dict[str, str], page: int) -> Any:
+        response = requests.get(self.url, params={**params, 'page': page}, headers=self.headers)
+        response.raise_for_status()
+        return response.json()
 
 
 class GDGService:
@@ -364,24 +616,31 @@ class GDGService:
         https://gdg.community.dev/events/#/calendar
         https://gdg.community.dev/api/event/?QUERY_PARAMS
     """
+    # Fields read by the unified schema, `chapter` holds the description
+    PROJECTION = [
+        'id', 'title', 'event_type', 'event_type_title', 'start_date', 'end_date', 'url', 'chapter',
+    ]
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> list[Any]:
         logging.info("Fetching GDG Events")
         start_date = datetime.now() - timedelta(days=31)
         end_date = datetime.now() + timedelta(days=31)
         params = {
-            "fields": (
-                "id,chapter,event_type,event_type_title,title,status,"
-                "start_date,end_date,start_date_naive,end_date_naive,url"
-            ),
             "start_date": start_date.strftime('%Y-%m-%d'),
             "end_date": end_date.strftime('%Y-%m-%d'),
         }
-        response = requests.get(GDG_URL, params=params)
+        return BevyClient(GDG_URL, self.get_headers(), self.PROJECTION).fetch_pages(params)
+
+    def parse(self, pages: list[Any]) -> list[dict[str, Any]]:
+        today = datetime.now(timezone.utc).date()
         return [
             item
-            for item in response.json()['results']
-            if datetime.fromisoformat(item["end_date"]).date() >= datetime.now(timezone.utc).date()
+            for data in pages
+            for item in data['results']
+            if datetime.fromisoformat(item["end_date"]).date() >= today
         ]
 
     def get_headers(self) -> dict[str, str]:
@@ -399,15 +658,22 @@ class C2CGlobalService:
     """
         https://events.c2cglobal.com/events/#/list
     """
+    # Fields read by the unified schema, upcoming events have no end date or type
+    PROJECTION = ['id', 'title', 'event_type_title', 'start_date', 'url', 'chapter']
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> list[Any]:
         logging.info("Fetching C2C Global Events")
         params = {
             'result_types': 'upcoming_event',
             'country_code': 'Earth',
         }
-        response = requests.get(C2CGLOBAL_URL, params=params, headers=self.get_headers())
-        return response.json()['results']
+        return BevyClient(C2CGLOBAL_URL, self.get_headers(), self.PROJECTION).fetch_pages(params)
+
+    def parse(self, pages: list[Any]) -> list[dict[str, Any]]:
+        return [item for data in pages for item in data['results']]
 
     def get_headers(self) -> dict[str, str]:
         return {
@@ -426,9 +692,14 @@ class DatabricksService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> Any:
         logging.info("Fetching Databricks Events")
         response = requests.get(DATABRICKS_URL, headers=self.get_headers())
-        data = response.json()
+        return response.json()
+
+    def parse(self, data: Any) -> list[dict[str, Any]]:
         events = jmespath.search('result.pageContext.globalContext.eventsData.eventsEN', data)
         filtred_events = self.filter_events(events)
         return filtred_events
@@ -469,21 +740,53 @@ class DatastaxService:
     """
         https://www.datastax.com/ko/events?mode=calendar
     """
+    # GROQ projection, without the facet counts of the site filters
+    PROJECTION = ['title', 'dates', '"type": type->{_id}', '"slug": seo.slug.current']
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> list[Any]:
         logging.info("Fetching Datastax Events")
         today = datetime.today()
+        url = self.query_url(
+            today.strftime('%Y-%m-%d'),
+            (today + timedelta(days=30)).strftime('%Y-%m-%d'),
+        )
+        first_page = self._fetch_window(url, 0)
+        count = first_page['result']['count']
+        starts = range(DATASTAX_PAGE_SIZE, count, DATASTAX_PAGE_SIZE)
+        if not starts:
+            return [first_page]
+
+        logging.info(f"Datastax fetching {len(starts)} more windows of {count} events")
+        with ThreadPoolExecutor(min(PAGE_WORKERS, len(starts))) as executor:
+            return [first_page, *executor.map(partial(self._fetch_window, url), starts)]
+
+    def _fetch_window(self, url: str, start: int) -> Any:
+        params = {'$start': start, '$end': start + DATASTAX_PAGE_SIZE}
+        response = requests.get(url, params=params, headers=self.get_headers())
+        response.raise_for_status()
+        return response.json()
+
+    @classmethod
+    @lru_cache(maxsize=8)
+    def query_url(cls, date_from: str, date_to: str) -> str:
+        """Query of one date window, paged with the `$start` and `$end` parameters."""
+        query = (
+            f'{{"results": *[{DATASTAX_FILTER}] | order(dates[0].date asc) '
+            f'[$start...$end] {{{", ".join(cls.PROJECTION)}}}, '
+            f'"count": count(*[{DATASTAX_FILTER}])}}'
+        )
         params = {
-            "$search": '""',
-            "$from": '"' + today.strftime('%Y-%m-%d') + '"',
-            "$to": '"' + (today + timedelta(days=30)).strftime('%Y-%m-%d') + '"',
-            "$start": '0',
-            "$end": '24',
+            'query': query,
+            '$from': f'"{date_from}"',
+            '$to': f'"{date_to}"',
         }
-        url = DATASTAX_URL + '?query=%0A%20%20%7B%0A%20%20%20%20%22results%22%3A%20*%5B_type%20%3D%3D%20%22event%22%20%26%26%20contentHidden%20!%3D%20true%20%26%26%20!(_id%20in%20path(%22drafts.**%22))%20%26%26%20count((dates%5B%5D.date)%5B%40%20%3E%3D%20%24from%20%26%26%20%40%20%3C%3D%20%24to%5D)%20%3E%200%20%20%5D%20%7C%20order(dates%5B0%5D.date%20asc)%20%20%7B%0A%20%20%20%20%20%20%0Aattendance-%3E%2C%0Adates%2C%0Aintro%2C%0Atitle%2C%0Atype-%3E%2C%0A%22slug%22%3A%20seo.slug.current%2C%0A%0A%20%20%20%20%7D%2C%0A%20%20%20%20%22count%22%3A%20count(*%5B_type%20%3D%3D%20%22event%22%20%26%26%20contentHidden%20!%3D%20true%20%26%26%20!(_id%20in%20path(%22drafts.**%22))%20%26%26%20count((dates%5B%5D.date)%5B%40%20%3E%3D%20%24from%20%26%26%20%40%20%3C%3D%20%24to%5D)%20%3E%200%20%20%5D)%2C%0A%20%20%20%20%22filters%22%3A%20%7B%0A%20%20%20%20%20%20%22attendance%22%3A%20*%5B_type%20%3D%3D%20%22event.attendance%22%5D%20%7B%0A%20%20%20%20%20%20%20%20_id%2C%0A%20%20%20%20%20%20%20%20name%2C%0A%20%20%20%20%20%20%20%20%22count%22%3A%20count(*%5B_type%20%3D%3D%20%22event%22%20%26%26%20contentHidden%20!%3D%20true%20%26%26%20!(_id%20in%20path(%22drafts.**%22))%20%26%26%20count((dates%5B%5D.date)%5B%40%20%3E%3D%20%24from%20%26%26%20%40%20%3C%3D%20%24to%5D)%20%3E%200%20%26%26%20references(%5E._id)%20%26%26%20true%5D)%2C%0A%20%20%20%20%20%20%7D%20%7C%20order(name%20asc)%20%5Bcount%20%3E%200%5D%2C%0A%20%20%20%20%20%20%22audience%22%3A%20*%5B_type%20%3D%3D%20%22event.audience%22%5D%20%7B%0A%20%20%20%20%20%20%20%20_id%2C%0A%20%20%20%20%20%20%20%20name%2C%0A%20%20%20%20%20%20%20%20%22count%22%3A%20count(*%5B_type%20%3D%3D%20%22event%22%20%26%26%20contentHidden%20!%3D%20true%20%26%26%20!(_id%20in%20path(%22drafts.**%22))%20%26%26%20count((dates%5B%5D.date)%5B%40%20%3E%3D%20%24from%20%26%26%20%40%20%3C%3D%20%24to%5D)%20%3E%200%20%26%26%20references(%5E._id)%20%26%26%20true%5D)%2C%0A%20%20%20%20%20%20%7D%20%7C%20order(name%20asc)%20%5Bcount%20%3E%200%5D%2C%0A%20%20%20%20%20%20%22industry%22%3A%20*%5B_type%20%3D%3D%20%22event.industry%22%5D%20%7B%0A%20%20%20%20%20%20%20%20_id%2C%0A%20%20%20%20%20%20%20%20name%2C%0A%20%20%20%20%20%20%20%20%22count%22%3A%20count(*%5B_type%20%3D%3D%20%22event%22%20%26%26%20contentHidden%20!%3D%20true%20%26%26%20!(_id%20in%20path(%22drafts.**%22))%20%26%26%20count((dates%5B%5D.date)%5B%40%20%3E%3D%20%24from%20%26%26%20%40%20%3C%3D%20%24to%5D)%20%3E%200%20%26%26%20references(%5E._id)%20%26%26%20true%5D)%2C%0A%20%20%20%20%20%20%7D%20%7C%20order(name%20asc)%20%5Bcount%20%3E%200%5D%2C%0A%20%20%20%20%20%20%22region%22%3A%20*%5B_type%20%3D%3D%20%22event.region%22%5D%20%7B%0A%20%20%20%20%20%20%20%20_id%2C%0A%20%20%20%20%20%20%20%20name%2C%0A%20%20%20%20%20%20%20%20%22count%22%3A%20count(*%5B_type%20%3D%3D%20%22event%22%20%26%26%20contentHidden%20!%3D%20true%20%26%26%20!(_id%20in%20path(%22drafts.**%22))%20%26%26%20count((dates%5B%5D.date)%5B%40%20%3E%3D%20%24from%20%26%26%20%40%20%3C%3D%20%24to%5D)%20%3E%200%20%26%26%20references(%5E._id)%20%26%26%20true%5D)%2C%0A%20%20%20%20%20%20%7D%20%7C%20order(name%20asc)%20%5Bcount%20%3E%200%5D%2C%0A%20%20%20%20%20%20%22type%22%3A%20*%5B_type%20%3D%3D%20%22event.type%22%5D%20%7B%0A%20%20%20%20%20%20%20%20_id%2C%0A%20%20%20%20%20%20%20%20name%2C%0A%20%20%20%20%20%20%20%20%22count%22%3A%20count(*%5B_type%20%3D%3D%20%22event%22%20%26%26%20contentHidden%20!%3D%20true%20%26%26%20!(_id%20in%20path(%22drafts.**%22))%20%26%26%20count((dates%5B%5D.date)%5B%40%20%3E%3D%20%24from%20%26%26%20%40%20%3C%3D%20%24to%5D)%20%3E%200%20%26%26%20references(%5E._id)%20%26%26%20true%5D)%2C%0A%20%20%20%20%20%20%7D%20%7C%20order(name%20asc)%20%5Bcount%20%3E%200%5D%2C%0A%20%20%20%20%7D%2C%0A%20%20%7D%0A%20%20'  # noqa: E501
-        response = requests.get(url, params=params, headers=self.get_headers())
-        data = response.json()
-        events = data['result']['results']
+        return f'{DATASTAX_URL}?{urlencode(params)}'
+
+    def parse(self, pages: list[Any]) -> list[dict[str, Any]]:
+        events = [event for data in pages for event in data['result']['results']]
         for i in range(len(events)):
             events[i]["event_url"] = "https://www.datastax.com/ko/" + events[i]["slug"]
         return events
@@ -505,9 +808,15 @@ class ScalaLangService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> str:
         logging.info("Fetching Scala Lang Events")
         response = requests.get(SCALA_LANG_URL, headers=self.get_headers())
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return response.text
+
+    def parse(self, html: str) -> list[dict[str, Any]]:
+        soup = BeautifulSoup(html, 'html.parser')
 
         events = []
         for el in soup.select('a.training-item'):
@@ -524,7 +833,7 @@ class ScalaLangService:
                 end_iso = datetime.strptime(end, "%d %B %Y").isoformat()
 
             events.append({
-                'id': str(uuid.uuid4()),
+                'id': stable_id(el.get('href')),
                 'event_url': el.get('href'),
                 'title': el.select_one('h4').get_text(strip=True),
                 'start_time': start_iso,
@@ -548,18 +857,25 @@ class CassandraService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> str:
         logging.info("Fetching Cassandra Events")
         response = requests.get(CASSANDRA_URL, headers=self.get_headers())
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return response.text
+
+    def parse(self, html: str) -> list[dict[str, Any]]:
+        soup = BeautifulSoup(html, 'html.parser')
 
         events = []
         for el in soup.select('div#all-tiles .openblock.card'):
             start_end_str = el.select_one('h4').get_text(strip=True)
             start_iso, end_iso = self.parse_date(start_end_str)
 
+            url = el.select_one('.card-btn a').get('href')
             events.append({
-                'id': str(uuid.uuid4()),
-                'event_url': el.select_one('.card-btn a').get('href'),
+                'id': stable_id(url),
+                'event_url': url,
                 'title': el.select_one('h3').get_text(strip=True),
                 'start_time': start_iso,
                 'end_time': end_iso,
@@ -623,11 +939,16 @@ class LinuxFoundationService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> str:
         logging.info("Fetching Linux Foundation Events")
         url = LINUX_FOUNDATION_URL + '?sfid=138&sf_action=get_data&sf_data=all&lang=en'
         response = requests.get(url, headers=self.get_headers())
-        html_text = response.json()['results']
-        soup = BeautifulSoup(html_text, 'html.parser')
+        return response.json()['results']
+
+    def parse(self, html: str) -> list[dict[str, Any]]:
+        soup = BeautifulSoup(html, 'html.parser')
 
         events = []
         for el in soup.select('article'):
@@ -688,6 +1009,9 @@ class WeaviateService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> Any:
         logging.info("Fetching Weavite Events")
 
         params = {
@@ -695,8 +1019,9 @@ class WeaviateService:
             'w': '0068937f-3d15-4161-9289-c657562f9f91',
         }
         response = requests.get(WEAVIATE_URL, params=params, headers=self.get_headers())
-        data = response.json()
+        return response.json()
 
+    def parse(self, data: Any) -> list[dict[str, Any]]:
         events = jmespath.search('data.widgets | values(@) | [0].data.settings.events', data)
         today = datetime.now()
         upcomming_events = [
@@ -742,8 +1067,12 @@ class RedisService:
             data['wpx_paging'] = str(page)
             response = requests.post(REDIS_URL, headers=self.get_headers(), data=data)
             soup = BeautifulSoup(response.text, 'html.parser')
+            items = soup.select('div.events-item')
+            if not items:
+                # Past the last page
+                break
 
-            for el in soup.select('div.events-item'):
+            for el in items:
                 start_str = el.select_one('span.tableau-result-date').get_text(strip=True)
                 try:
                     start_iso = parser.parse(start_str).isoformat()
@@ -751,9 +1080,10 @@ class RedisService:
                     has_next = False
                     break
 
+                url = el.select_one('a').get('href')
                 events.append({
-                    'id': str(uuid.uuid4()),
-                    'event_url': el.select_one('a').get('href'),
+                    'id': stable_id(url),
+                    'event_url': url,
                     'title': el.select_one('p.tableau-result-desc').get_text(strip=True),
                     'start_time': start_iso,
                 })
@@ -778,9 +1108,15 @@ class PostgresService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> str:
         logging.info("Fetching Postgres Events")
         response = requests.get(POSTGRES_URL, headers=self.get_headers())
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return response.text
+
+    def parse(self, html: str) -> list[dict[str, Any]]:
+        soup = BeautifulSoup(html, 'html.parser')
 
         events = []
         for el_hr in soup.select('hr.eventseparator'):
@@ -796,10 +1132,11 @@ class PostgresService:
             if end_str:
                 end_iso = parser.parse(end_str).isoformat()
 
+            url = title_div.select_one('a').get('href')
             events.append({
-                'id': str(uuid.uuid4()),
+                'id': stable_id(url),
                 'title': title_div.select_one('a').get_text(strip=True),
-                'event_url': title_div.select_one('a').get('href'),
+                'event_url': url,
                 'start_time': start_iso,
                 'end_time': end_iso,
             })
@@ -821,9 +1158,15 @@ class HopsworksService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> str:
         logging.info("Fetching Hopsworks Events")
         response = requests.get(HOPSWORKS_URL, headers=self.get_headers())
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return response.text
+
+    def parse(self, html: str) -> list[dict[str, Any]]:
+        soup = BeautifulSoup(html, 'html.parser')
 
         events = []
         for el in soup.select('div[data-w-tab="Tab 1"] .w-dyn-list .w-dyn-item'):
@@ -854,10 +1197,11 @@ class HopsworksService:
                     tzinfos={tz: int(whois_timezone_info[tz])},
                 ).isoformat()
 
+            url = "https://www.hopsworks.ai" + el.select_one('a').get('href')
             events.append({
-                'id': str(uuid.uuid4()),
+                'id': stable_id(url),
                 'title': el.select_one('.type-div').get_text(strip=True),
-                'event_url': "https://www.hopsworks.ai" + el.select_one('a').get('href'),
+                'event_url': url,
                 'start_time': start_iso,
                 'end_time': end_iso,
             })
@@ -880,18 +1224,25 @@ class PythonService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> str:
         logging.info("Fetching Python Events")
         response = requests.get(PYTHON_URL, headers=self.get_headers())
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return response.text
+
+    def parse(self, html: str) -> list[dict[str, Any]]:
+        soup = BeautifulSoup(html, 'html.parser')
 
         events = []
         for el in soup.select('.list-recent-events li'):
             start_str = el.select_one('time').get('datetime')
             start_iso = parser.parse(start_str).isoformat()
+            url = "https://www.python.org" + el.select_one('a').get('href')
             events.append({
-                'id': str(uuid.uuid4()),
+                'id': stable_id(url),
                 'title': el.select_one('h3').get_text(strip=True),
-                'event_url': "https://www.python.org" + el.select_one('a').get('href'),
+                'event_url': url,
                 'start_time': start_iso,
             })
 
@@ -925,6 +1276,7 @@ class EventycoService:
             url = EVENTYCO_URL + f'~{page}'
             response = requests.get(url, headers=self.get_headers())
             soup = BeautifulSoup(response.text, 'html.parser')
+            names_count = len(names)
 
             for ld_script in soup.select('script[type="application/ld+json"]'):
                 data = json.loads(ld_script.text)
@@ -941,13 +1293,17 @@ class EventycoService:
                     break
 
                 events.append({
-                    'id': str(uuid.uuid4()),
+                    # Organizer URLs are shared by their events, names are unique
+                    'id': stable_id(name),
                     'title': name,
                     'event_url': data['organizer']['url'],
                     'start_time': start_date_str,
                     'end_time': data['endDate'],
                 })
 
+            # Past the last page there are no events, or only ones already seen
+            if len(names) == names_count:
+                break
             page += 1
 
         return events
@@ -967,9 +1323,15 @@ class DbtService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> str:
         logging.info("Fetching dbt Events")
         response = requests.get(DBT_URL, headers=self.get_headers())
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return response.text
+
+    def parse(self, html: str) -> list[dict[str, Any]]:
+        soup = BeautifulSoup(html, 'html.parser')
 
         events = []
         for el in soup.select('#all-posts-container article'):
@@ -981,10 +1343,11 @@ class DbtService:
 
             date_str = date_el.get_text(strip=True).split(' - ')[0]
             date_iso = parser.parse(date_str).isoformat()
+            url = el.select_one('a')['href']
             events.append({
-                'id': str(uuid.uuid4()),
+                'id': stable_id(url),
                 'title': title,
-                'event_url': el.select_one('a')['href'],
+                'event_url': url,
                 'start_time': date_iso,
             })
 
@@ -1011,12 +1374,12 @@ class DevEventsService:
         has_next = True
         date_threshold = datetime.now().date() + timedelta(days=10)
         page = 1
-        last_date = None
 
         # TODO: parse ld instead of html
         while has_next:
             response = requests.get(DEV_EVENTS_URL + f"?page={page}", headers=self.get_headers())
             soup = BeautifulSoup(response.text, 'html.parser')
+            last_date = None
 
             for el in soup.select("#events .row.columns:not(.featured)"):
                 if el.select_one("nav") is not None:
@@ -1033,15 +1396,14 @@ class DevEventsService:
                     continue
 
                 events.append({
-                    'id': str(uuid.uuid4()),
+                    'id': stable_id(event_data.get('url') or event_data.get('name')),
                     'title': event_data.get('name'),
                     'event_url': event_data.get('url'),
                     'start_time': start_datetime.isoformat() if start_datetime else None,
                     'end_time': end_datetime.isoformat() if end_datetime else None,
                 })
 
-            # TODO: handle the last page
-            # it is very unlikely we will reach last page earlier than date threshold
+            # A page without events is past the last page
             if last_date is None or last_date > date_threshold:
                 has_next = False
             page += 1
@@ -1060,19 +1422,24 @@ class TechCrunchService:
     """
         https://techcrunch.com/events/
     """
+    PROJECTION = ['id', 'title', 'link', 'dates']
 
     def fetch_events(self) -> list[dict[str, Any]]:
-        logging.info("Fetching DevEvents Events")
+        return self.parse(self.download())
 
-        events = []
+    def download(self) -> Any:
+        logging.info("Fetching DevEvents Events")
         params = {
-            '_embed': 'true',
+            '_fields': ','.join(self.PROJECTION),
             'upcoming': 'true',
             'parent': '0',
             'cachePrevention': '0',
         }
         response = requests.get(TECH_CRUNCH_URL, params=params, headers=self.get_headers())
-        data = response.json()
+        return response.json()
+
+    def parse(self, data: Any) -> list[dict[str, Any]]:
+        events = []
         for event in data:
             start_iso = parser.parse(event['dates']['begin']).isoformat()
             end_iso = parser.parse(event['dates']['end']).isoformat()
@@ -1103,9 +1470,15 @@ class TechMemeService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> str:
         logging.info("Fetching TechMeme Events")
         response = requests.get(TECH_MEME_URL, headers=self.get_headers())
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return response.text
+
+    def parse(self, html: str) -> list[dict[str, Any]]:
+        soup = BeautifulSoup(html, 'html.parser')
 
         date_threshold = datetime.now() + timedelta(days=30)
         events = []
@@ -1138,10 +1511,11 @@ class TechMemeService:
             end_iso = None
             if end_datetime:
                 end_iso = end_datetime.isoformat()
+            url = 'https://www.techmeme.com' + el.select_one('a')['href']
             events.append({
-                'id': str(uuid.uuid4()),
+                'id': stable_id(url),
                 'title': title,
-                'event_url': 'https://www.techmeme.com' + el.select_one('a')['href'],
+                'event_url': url,
                 'start_time': start_iso,
                 'end_time': end_iso,
             })
@@ -1163,9 +1537,15 @@ class BloombergService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> str:
         logging.info("Fetching Bloomberg Events")
         response = requests.get(BLOOMBERG_URL, headers=self.get_headers())
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return response.text
+
+    def parse(self, html: str) -> list[dict[str, Any]]:
+        soup = BeautifulSoup(html, 'html.parser')
 
         events = []
         date_threshold = datetime.now() + timedelta(days=30)
@@ -1180,7 +1560,7 @@ class BloombergService:
             start_iso = start_datetime.isoformat()
 
             events.append({
-                'id': str(uuid.uuid4()),
+                'id': stable_id(a_el['href']),
                 'title': title,
                 'event_url': a_el['href'],
                 'start_time': start_iso,
@@ -1203,9 +1583,14 @@ class CloudnairGoogleService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> Any:
         logging.info("Fetching Cloudnair Google Events")
         response = requests.get(CLOUDNAIR_GOOGLE_URL, headers=self.get_headers())
-        data = response.json()
+        return response.json()
+
+    def parse(self, data: Any) -> list[dict[str, Any]]:
         events = data['events']
         for e in events:
             e['event_url'] = 'https://cloudonair.withgoogle.com/events/' + e['url_slug']
@@ -1226,9 +1611,15 @@ class CohereService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> str:
         logging.info("Fetching Cohere Events")
         response = requests.get(COHERE_URL, headers=self.get_headers())
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return response.text
+
+    def parse(self, html: str) -> list[dict[str, Any]]:
+        soup = BeautifulSoup(html, 'html.parser')
 
         script = soup.select_one('#__NEXT_DATA__').text
         data = parse_js_object(script)
@@ -1254,9 +1645,15 @@ class SamsungService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> str:
         logging.info("Fetching Samsung Events")
         response = requests.get(SAMSUNG_URL, headers=self.get_headers())
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return response.text
+
+    def parse(self, html: str) -> list[dict[str, Any]]:
+        soup = BeautifulSoup(html, 'html.parser')
 
         events = []
         for event_el in soup.select('.ir-event-view-area .ir-event-list li'):
@@ -1301,10 +1698,15 @@ class TSMCService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> str:
         logging.info("Fetching TSMC Events")
-        scraper = cloudscraper.create_scraper()
-        response = scraper.get(TSMC_URL)
-        soup = BeautifulSoup(response.text, 'html.parser')
+        response = SCRAPERS.get(TSMC_URL)
+        return response.text
+
+    def parse(self, html: str) -> list[dict[str, Any]]:
+        soup = BeautifulSoup(html, 'html.parser')
 
         events = []
         for event_el in soup.select('.view-id-events li.item'):
@@ -1327,10 +1729,15 @@ class NVIDIAService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> Any:
         logging.info("Fetching NVIDIA Events")
         ts = str(time.time()).replace('.', '')
         response = requests.get(NVIDIA_URL + f'?{ts}', headers=self.get_headers())
-        data = response.json()
+        return response.json()
+
+    def parse(self, data: Any) -> list[dict[str, Any]]:
         dtnow = datetime.now()
 
         events = []
@@ -1371,9 +1778,15 @@ class GithubService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> str:
         logging.info("Fetching Github Events")
         response = requests.get(GITHUB_URL, headers=self.get_headers())
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return response.text
+
+    def parse(self, html: str) -> list[dict[str, Any]]:
+        soup = BeautifulSoup(html, 'html.parser')
 
         events = []
         for event_el in soup.select('main ul.list-style-none.mb-4 li div.d-lg-block'):
@@ -1413,9 +1826,15 @@ class SnowflakeService:
     """
 
     def fetch_events(self) -> list[dict[str, Any]]:
+        return self.parse(self.download())
+
+    def download(self) -> str:
         logging.info("Fetching Snowflake Events")
         response = requests.get(SNOWFLAKE_URL, headers=self.get_headers())
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return response.text
+
+    def parse(self, html: str) -> list[dict[str, Any]]:
+        soup = BeautifulSoup(html, 'html.parser')
 
         events = []
         for event_el in soup.select('.search-filter-results .cell'):
@@ -0,0 +1,197 @@
+import glob
+import json
+import logging
+import os
+import re
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+
+from event import UnifiedEvent, json_default
+
+
+class DataManager:
+    DATA_DIRECTORY = "data"
+    # Freshest partition of every source, updated as each source is committed
+    MANIFEST_FILE = "manifest.json"
+    # One line per source run with its state, duration and error
+    RUNS_FILE = "runs.jsonl"
+    # Size at which the runs log is rotated, one rotated log is kept
+    MAX_RUNS_SIZE = 1024 * 1024
+
+    @classmethod
+    def save_data(cls, events: list[dict[str, str | None]]) -> None:
+        os.makedirs(cls.DATA_DIRECTORY, exist_ok=True)
+
+        date_str = datetime.now().strftime('%Y_%m_%d_%H.%M')
+        filename = os.path.join(cls.DATA_DIRECTORY, f'data_{date_str}.json')
+
+        data = {
+            'date': datetime.now().isoformat(),
+            'events': events,
+        }
+
+        with open(filename, 'w') as f:
+            json.dump(data, f, default=json_default)
+        logging.info(f"Data saved in file: {filename}")
+
+    @classmethod
+    def new_snapshot(cls) -> str:
+        return datetime.now().strftime('%Y_%m_%d_%H.%M.%S')
+
+    @classmethod
+    def save_partition(
+        cls,
+        snapshot: str,
+        source: str,
+        events: list[dict[str, Any]],
+        payload: Optional[str] = None,
+    ) -> None:
+        """
+            Commits the events of one source to `snapshot` and points the manifest at them,
+            so readers see each source as soon as it is fetched. `payload` is the archive
+            hash of the raw payload the events were parsed from. The partition it replaces
+            is deleted, with its snapshot directory once no partition is left there.
+        """
+        filename = os.path.join(
+            cls.DATA_DIRECTORY, f'snapshot_{snapshot}', f'{slugify(source)}.json')
+        date = datetime.now().isoformat()
+
+        # Written under the lock too, so no partition is deleted before it is referenced
+        with cls.lock(cls.MANIFEST_FILE):
+            write_json(filename, {'date': date, 'source': source, 'events': events})
+            manifest = cls.load_manifest() or {'sources': {}}
+            replaced = manifest['sources'].get(source, {}).get('path')
+            manifest['date'] = date
+            manifest['sources'][source] = {
+                'path': os.path.relpath(filename, cls.DATA_DIRECTORY),
+                'snapshot': snapshot,
+                'date': date,
+                'count': len(events),
+                'payload': payload,
+            }
+            write_json(os.path.join(cls.DATA_DIRECTORY, cls.MANIFEST_FILE), manifest)
+            if replaced and replaced != manifest['sources'][source]['path']:
+                cls._remove_partition(replaced)
+        logging.info(f"{source} partition saved in file: {filename}")
+
+    @classmethod
+    def _remove_partition(cls, path: str) -> None:
+        filename = os.path.join(cls.DATA_DIRECTORY, path)
+        try:
+            os.remove(filename)
+            os.rmdir(os.path.dirname(filename))
+        except OSError:
+            # Already gone, or other sources still have their partition in the snapshot
+            pass
+
+    @classmethod
+    def mark_stale(cls, source: str, error: str) -> None:
+        """Flags the partition kept for a source whose last fetch failed."""
+        with cls.lock(cls.MANIFEST_FILE):
+            manifest = cls.load_manifest()
+            partition = manifest.get('sources', {}).get(source)
+            if partition is None:
+                return
+            partition.setdefault('stale_since', datetime.now().isoformat())
+            partition['error'] = error
+            write_json(os.path.join(cls.DATA_DIRECTORY, cls.MANIFEST_FILE), manifest)
+
+    @classmethod
+    def record_run(cls, run: dict[str, Any]) -> None:
+        """Appends the outcome of one source run to the runs log, rotated at MAX_RUNS_SIZE."""
+        run = {'date': datetime.now().isoformat(), **run}
+        filename = os.path.join(cls.DATA_DIRECTORY, cls.RUNS_FILE)
+        with cls.lock(cls.RUNS_FILE):
+            if os.path.exists(filename) and os.path.getsize(filename) >= cls.MAX_RUNS_SIZE:
+                os.replace(filename, f'{filename}.1')
+            with open(filename, 'a') as f:
+                f.write(json.dumps(run) + '\n')
+
+    @classmethod
+    @contextmanager
+    def lock(cls, filename: str) -> Iterator[None]:
+        """Serializes updates of a data file by the fetch daemon and the UI worker."""
+        os.makedirs(cls.DATA_DIRECTORY, exist_ok=True)
+        with open(os.path.join(cls.DATA_DIRECTORY, f'{filename}.lock'), 'w') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    @classmethod
+    def load_manifest(cls) -> Any:
+        try:
+            with open(os.path.join(cls.DATA_DIRECTORY, cls.MANIFEST_FILE), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    @classmethod
+    def load_latest_data(cls) -> Any:
+        manifest = cls.load_manifest()
+        if manifest:
+            try:
+                return cls._load_partitions(manifest)
+            except FileNotFoundError:
+                # A partition was replaced while reading, the new manifest points at its successor
+                return cls._load_partitions(cls.load_manifest())
+
+        files = glob.glob(f'{cls.DATA_DIRECTORY}/data_*.json')
+        if not files:
+            return {}
+
+        latest_file = max(files, key=os.path.getctime)
+        with open(latest_file, 'r') as f:
+            data = json.load(f)
+        data['events'] = load_events(data['events'])
+
+        logging.info(f"Data loaded from file: {latest_file}")
+        return data
+
+    @classmethod
+    def data_version(cls) -> str:
+        """Cheap token that changes whenever `load_latest_data` would return new data."""
+        manifest_file = os.path.join(cls.DATA_DIRECTORY, cls.MANIFEST_FILE)
+        if os.path.exists(manifest_file):
+            return f'{manifest_file}:{os.stat(manifest_file).st_mtime_ns}'
+
+        files = glob.glob(f'{cls.DATA_DIRECTORY}/data_*.json')
+        if not files:
+            return ''
+        latest_file = max(files, key=os.path.getctime)
+        return f'{latest_file}:{os.stat(latest_file).st_mtime_ns}'
+
+    @classmethod
+    def _load_partitions(cls, manifest: dict[str, Any]) -> dict[str, Any]:
+        events = []
+        for partition in manifest['sources'].values():
+            with open(os.path.join(cls.DATA_DIRECTORY, partition['path']), 'r') as f:
+                events += load_events(json.load(f)['events'])
+
+        logging.info(f"Data loaded from {len(manifest['sources'])} partitions")
+        sources = manifest['sources']
+        stale = [name for name, partition in sources.items() if 'stale_since' in partition]
+        return {'date': manifest['date'], 'events': events, 'stale_sources': stale}
+
+
+def load_events(events: list[dict[str, Any]]) -> list[UnifiedEvent]:
+    return [UnifiedEvent.from_dict(event) for event in events]
+
+
+def slugify(source: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', source.lower())
+
+
+def write_json(filename: str, data: Any) -> None:
+    """Writes through a temporary file so readers never see a partial file."""
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    tmp_filename = f'{filename}.{os.getpid()}.tmp'
+    with open(tmp_filename, 'w') as f:
+        json.dump(data, f, default=json_default)
+    os.replace(tmp_filename, filename)
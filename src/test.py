@@ -1,14 +1,44 @@
 import json
 import os
+import subprocess
+import sys
+import threading
+import time
+import types
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer
 from urllib.parse import urlparse, urlunparse
 
+import jmespath
+import pandas as pd
 import pytest
 import requests
 
-from fetch import DataManager, main
+import services
+from api import (ApiError, ApiHandler, Snapshot, decode_cursor, encode_cursor,
+                 parse_datetime)
+from archive import reparse
+from bench import synthetic_events, write_snapshot
+from calendar_component import _events_payload
+from daemon import FetchDaemon
+from event import FIELDS, UnifiedEvent, json_default
+from fetch import (SERVICES, Source, SplitFetcher, fetch_sources, get_fetchers,
+                   main, select_sources, split_fetcher, transform_events,
+                   transform_to_unified_schema)
+from ics import ICalendarFeed, event_uid, fold, render_vevent
+from mock_server import HostProfile, MockHandler, MockUpstream
+from scheduler import INITIAL_TTLS, RefreshScheduler
+from search import SearchIndex
 from services import (C2CGLOBAL_URL, CONF_TECH_URL, EVENTBRITE_URL, GDG_URL,
                       LOCATIONS, MEETUP_URL, C2CGlobalService, ConfTechService,
-                      GDGService, MeetupService)
+                      DatastaxService, DevEventsService, EventycoService,
+                      GDGService, MeetupCoveragePlanner, MeetupService,
+                      PythonService, RedisService, ScraperPool)
+from storage import DataManager
+from ui import (CALENDAR_SOURCES, OTHER_SOURCE_CODE, SOURCE_CODES, EventIndex,
+                EventManager, calendar_events, get_visible_window)
+from watch import DataWatcher, Inotify
+from worker import FetchWorker, JobStatus
 
 MOCK_DIR = 'mock_data'
 URL_MAPPINGS = {
@@ -18,6 +48,13 @@ URL_MAPPINGS = {
     GDG_URL: "gdg.json",
     C2CGLOBAL_URL: "c2c_global.json",
 }
+# Redis page of dated events only, an undated one such as in redis.html ends the paging
+REDIS_PAGE = """
+    <div class="events-item"><a href="https://redis.com/webinars/streams/">
+        <span class="tableau-result-date">March 12, 2030</span>
+        <p class="tableau-result-desc">Streams</p>
+    </a></div>
+"""
 
 
 def test_main_integration(monkeypatch):
@@ -30,6 +67,646 @@ def test_main_integration(monkeypatch):
     assert 'events' in saved_data, "Events not found in the saved data"
 
 
+def test_partitions_merge_freshest_per_source(monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    DataManager.save_partition('old', 'Meetup', [{'id': 'm1'}])
+    DataManager.save_partition('old', 'GCD', [{'id': 'g1'}])
+    DataManager.save_partition('new', 'GCD', [{'id': 'g2'}, {'id': 'g3'}])
+
+    data = DataManager.load_latest_data()
+
+    assert sorted(event['id'] for event in data['events']) == ['g2', 'g3', 'm1']
+    # The replaced GCD partition is deleted, the old snapshot still holds Meetup's
+    assert sorted(os.listdir(tmp_path / 'snapshot_old')) == ['meetup.json']
+    DataManager.save_partition('new', 'Meetup', [{'id': 'm2'}])
+    assert not (tmp_path / 'snapshot_old').exists()
+
+
+def test_runs_log_is_rotated(monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    monkeypatch.setattr(DataManager, 'MAX_RUNS_SIZE', 100)
+    for n in range(10):
+        DataManager.record_run({'source': 'GCD', 'run': n})
+
+    assert os.path.getsize(tmp_path / DataManager.RUNS_FILE) < 200
+    assert sorted(os.listdir(tmp_path)) == ['runs.jsonl', 'runs.jsonl.1', 'runs.jsonl.lock']
+
+
+def test_unified_events_are_compact_and_dict_compatible(monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    events = transform_events(('Python', [{'id': 'p1', 'title': 'PyCon', 'going': 5}]))
+    DataManager.save_partition('snapshot', 'Python', events)
+
+    event = DataManager.load_latest_data()['events'][0]
+
+    assert isinstance(event, UnifiedEvent) and not hasattr(event, '__dict__')
+    assert event == events[0] == event.to_dict()
+    assert list(event) == list(FIELDS) and event['title'] == 'PyCon'
+    assert event.get('going') == 5 and event.get('missing') is None
+    assert event['source'] is events[0]['source']
+
+    reordered = transform_to_unified_schema({'id': 'p2', 'name': 'x'}, 'Python', {
+        'title': ['name'], 'id': ['id']})
+    assert (reordered['id'], reordered['title'], reordered['going']) == ('p2', 'x', None)
+    with pytest.raises(TypeError):
+        json.dumps({'events': [event], 'date': datetime.now()}, default=json_default)
+
+
+def test_synthetic_snapshot_loads_like_a_fetch(monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    events = synthetic_events(1000, seed=1)
+    write_snapshot(events)
+
+    data = DataManager.load_latest_data()
+
+    assert events == synthetic_events(1000, seed=1)
+    assert sorted(event['id'] for event in data['events']) == [event['id'] for event in events]
+    sources = [event['source'] for event in data['events']]
+    assert max(set(sources), key=sources.count) == 'Meetup'
+    assert any(event['going'] is None for event in events)
+
+
+def test_ui_does_not_import_services():
+    code = "import sys, ui; print('services' in sys.modules, 'bs4' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=os.path.dirname(__file__),
+        capture_output=True, text=True, check=True)
+
+    assert result.stdout.split() == ['False', 'False']
+
+
+def test_services_do_not_import_fetch():
+    code = "import sys, services; print('fetch' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=os.path.dirname(__file__),
+        capture_output=True, text=True, check=True)
+
+    assert result.stdout.split() == ['False']
+
+
+def test_scheduler_adapts_ttl_to_changes(monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    scheduler = RefreshScheduler({})
+    now = datetime(2024, 1, 1)
+
+    for run in range(4):
+        scheduler.record(Source.SAMSUNG, [{'id': str(run), 'title': 'Earnings'}], now)
+    for run in range(4):
+        scheduler.record(Source.MEETUP, [{'id': 'm', 'going': run}], now)
+
+    assert scheduler.ttl(Source.SAMSUNG) > INITIAL_TTLS[Source.SAMSUNG]
+    assert scheduler.ttl(Source.MEETUP) < INITIAL_TTLS[Source.MEETUP]
+    assert scheduler.due([Source.SAMSUNG, Source.MEETUP, Source.GCD], now) == [Source.GCD]
+
+
+def test_scheduler_updates_keep_concurrent_runs(monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    with RefreshScheduler.updating() as scheduler:
+        scheduler.record(Source.GCD, [{'id': 'g'}])
+    with RefreshScheduler.updating() as scheduler:
+        assert list(scheduler.state) == ['GCD']
+        scheduler.defer(Source.MEETUP)
+
+    assert list(RefreshScheduler.load().state) == ['GCD', 'Meetup']
+
+
+def test_daemon_fetches_only_due_sources(monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    fetched = []
+
+    def get_fetchers(delta_days, sources):
+        return [
+            (source, lambda source=source: fetched.append(source) or [{'title': source.value}])
+            for source in sources
+        ]
+
+    monkeypatch.setattr('daemon.get_fetchers', get_fetchers)
+    with RefreshScheduler.updating() as scheduler:
+        scheduler.record(Source.GCD, [{'title': 'GCD'}])
+    daemon = FetchDaemon(1, [Source.MEETUP, Source.GCD, Source.PYTHON])
+
+    daemon.run_due()
+
+    assert fetched == [Source.MEETUP, Source.PYTHON]
+    state = RefreshScheduler.load().state
+    assert sorted(state) == ['GCD', 'Meetup', 'Python']
+    assert state['Meetup']['ttl'] == INITIAL_TTLS[Source.MEETUP].total_seconds()
+    assert daemon.scheduler.ttl(Source.PYTHON) == timedelta(hours=6)
+
+    fetched.clear()
+    daemon.run_due()
+    assert fetched == []
+
+
+def test_search_index_prefix_terms(monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    events = [
+        {'title': 'Kafka Summit', 'description': '<p>Streaming with Postgres</p>'},
+        {'title': 'PostgreSQL Day', 'description': None},
+        {'title': 'PyCon', 'description': 'Python'},
+    ]
+    SearchIndex.build('snapshot', events)
+
+    assert SearchIndex.search('snapshot', 'kaf') == {0}
+    assert SearchIndex.search('snapshot', 'postgres') == {0, 1}
+    assert SearchIndex.search('snapshot', 'postgres day') == {1}
+    assert SearchIndex.search('other', 'kafka') is None
+
+
+def test_event_index_window():
+    events = pd.DataFrame([
+        {'title': 'long', 'start_time': '2023-10-01T10:00:00Z', 'end_time': '2023-11-20T10:00:00Z'},
+        {'title': 'before', 'start_time': '2023-10-02T10:00:00Z', 'end_time': None},
+        {'title': 'inside', 'start_time': '2023-11-03T10:00:00+03:00', 'end_time': None},
+        {'title': 'margin', 'start_time': '2023-11-12T10:00:00Z', 'end_time': None},
+        {'title': 'after', 'start_time': '2023-12-20T10:00:00Z', 'end_time': None},
+    ]).assign(id=None, going=None, source='Python')
+    index = EventIndex(EventManager._transform_data(events))
+
+    window = index.window(*get_visible_window({'start': '2023-11-01', 'end': '2023-11-08'}))
+
+    assert window['title'].tolist() == ['long', 'inside', 'margin']
+
+
+def test_calendar_payload_is_a_diff_of_the_last_sent_events(monkeypatch):
+    session = {}
+    monkeypatch.setattr('calendar_component.st.session_state', session)
+    events = pd.DataFrame([
+        {'id': '1', 'title': 'kept', 'start_time': '2023-11-01T10:00:00Z', 'source': 'Python'},
+        {'id': '2', 'title': 'gone', 'start_time': '2023-11-02T10:00:00Z', 'source': 'Meetup'},
+        {'id': '3', 'title': 'other', 'start_time': '2023-11-03T10:00:00Z', 'source': 'Unknown'},
+    ]).assign(end_time=None, going=None, event_url=None)
+    first = calendar_events(EventManager._transform_data(events.copy()))
+
+    payload = _events_payload(first, 'calendar')
+    assert (payload['base'], payload['removed']) == (None, [])
+    assert payload['added']['source'] == [
+        SOURCE_CODES['Python'], SOURCE_CODES['Meetup'], OTHER_SOURCE_CODE]
+    assert CALENDAR_SOURCES[OTHER_SOURCE_CODE]['name'] == 'Other'
+
+    events.loc[2, 'title'] = 'renamed'
+    second = calendar_events(EventManager._transform_data(events.drop(index=1)))
+    diff = _events_payload(second, 'calendar')
+    assert (diff['revision'], diff['base']) == (2, 1)
+    assert diff['removed'] == ['Meetup:2', 'Unknown:3']
+    assert diff['added']['title'] == ['renamed']
+    assert _events_payload(second, 'calendar') == {
+        'revision': 2, 'base': 2, 'added': {name: [] for name in second}, 'removed': []}
+
+    # Component value of a frontend that lost track of the revisions
+    session['calendar'] = {'resync': 1}
+    resync = _events_payload(second, 'calendar')
+    assert (resync['revision'], resync['base'], resync['added']) == (3, None, second)
+
+
+def test_calendar_ids_are_stable_across_fetches():
+    with open(os.path.join(MOCK_DIR, 'python.html'), encoding='utf-8') as f:
+        html = f.read()
+
+    def ids():
+        events = transform_events(('Python', PythonService().parse(html)))
+        return EventManager._event_ids(pd.DataFrame([event.to_dict() for event in events]))
+
+    assert ids().tolist() == ids().tolist()
+    events = pd.DataFrame([
+        {'source': 'Python', 'id': None, 'title': 'PyCon', 'start_time': '2023-11-02',
+         'event_url': 'https://pycon.org'},
+        {'source': 'Python', 'id': None, 'title': 'Sprint', 'start_time': '2023-11-03',
+         'event_url': None},
+    ])
+    assert EventManager._event_ids(events).tolist() == [
+        'Python:https://pycon.org', 'Python:Sprint@2023-11-03']
+
+
+@pytest.mark.parametrize('sources, min_going', [
+    ([], None), ([], 100), (['Meetup', 'GCD'], 100), (['Python'], 0), (['Unknown'], 10),
+])
+def test_event_index_partitions_match_full_scan(sources, min_going):
+    df_events = EventManager._transform_data(pd.DataFrame(synthetic_events(2000)))
+    index = EventIndex(df_events)
+    start, end = get_visible_window({'start': '2024-03-01', 'end': '2024-04-01'})
+
+    window = index.window(start, end, sources, min_going)
+
+    expected = index.window(start, end)
+    if sources:
+        expected = expected[expected['source'].isin(sources)]
+    if min_going is not None:
+        expected = expected[expected['going'].ge(min_going) | expected['going'].isnull()]
+    assert window.index.tolist() == expected.index.tolist()
+
+
+@pytest.mark.parametrize('inotify', [True, False])
+def test_data_watcher_sees_new_snapshots(monkeypatch, tmp_path, inotify):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    monkeypatch.setattr('watch.POLL_SECONDS', 0.05)
+    if not inotify:
+        monkeypatch.setattr(Inotify, 'create', classmethod(lambda cls: None))
+    changes = []
+    watcher = DataWatcher(on_change=changes.append)
+
+    DataManager.save_partition('snapshot', 'Python', [{'id': 'p1'}])
+    deadline = time.monotonic() + 5
+    while not changes and time.monotonic() < deadline:
+        time.sleep(0.01)
+    watcher.stop()
+
+    assert changes == [DataManager.data_version()] == [watcher.version]
+
+
+def test_fetch_worker_marks_dead_job_stale(monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    monkeypatch.setattr('worker.pid_exists', lambda pid: False)
+    JobStatus.write({'job_id': 'job', 'state': 'running', 'pid': 12345, 'sources': {}})
+    assert (tmp_path / JobStatus.STATUS_FILE).exists()
+
+    assert FetchWorker().status()['state'] == 'stale'
+    assert JobStatus.read()['state'] == 'stale'
+
+
+def test_api_snapshot_range_and_cursor():
+    events = [
+        {'source': 'Meetup', 'title': 'late', 'start_time': '2023-11-20T10:00:00Z', 'going': 3},
+        {'source': 'Python', 'title': 'early', 'start_time': '2023-11-01T10:00', 'going': None},
+        {'source': 'Meetup', 'title': 'mid', 'start_time': '2023-11-10T10:00+02:00', 'going': 50},
+        {'source': 'Meetup', 'title': 'undated', 'start_time': None, 'going': 50},
+    ]
+    snapshot = Snapshot('v1', {'date': '2023-11-01', 'events': events}, {})
+
+    window = snapshot.query(
+        parse_datetime('2023-11-05'), parse_datetime('2023-11-30'), {'Meetup'}, 10)
+    assert [event['title'] for event in window] == ['mid']
+    assert [event['title'] for event in snapshot.query(None, None, set(), None)] == [
+        'early', 'mid', 'late', 'undated']
+
+    assert decode_cursor(encode_cursor(snapshot, 2), snapshot) == 2
+    with pytest.raises(ApiError):
+        decode_cursor(encode_cursor(snapshot, 2), Snapshot('v2', {}, {}))
+
+
+def test_api_rejects_invalid_parameters(monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    DataManager.save_partition('snapshot', 'Python', [{'id': 'p1', 'going': 5}])
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ApiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/events'
+
+    try:
+        assert requests.get(url, params={'limit': '1'}).json()['total'] == 1
+        for params in [{'min_going': 'abc'}, {'limit': 'x'}, {'limit': '0'}, {'limit': '-1'}]:
+            response = requests.get(url, params=params)
+            assert response.status_code == 400, params
+
+            # Also rejected when the client holds the ETag such a request would get
+            handler = types.SimpleNamespace(variant=lambda etag: etag)
+            etag = ApiHandler.etag(handler, ApiHandler.store.get(), '/events', params)
+            headers = {'If-None-Match': etag, 'Accept-Encoding': 'identity'}
+            response = requests.get(url, params=params, headers=headers)
+            assert response.status_code == 400, params
+    finally:
+        server.shutdown()
+
+
+def test_icalendar_feed_renders_only_changed_events(monkeypatch):
+    rendered = []
+    monkeypatch.setattr(
+        'ics.render_vevent', lambda *args: rendered.append(args) or render_vevent(*args))
+    events = [
+        {'source': 'Meetup', 'id': '1', 'title': 'A, B', 'start_time': '2023-11-01T10:00:00Z'},
+        {'source': 'Python', 'id': None, 'title': 'PyCon', 'start_time': '2023-11-02',
+         'event_url': 'https://pycon.org'},
+        {'source': 'Python', 'id': '2', 'title': 'TBA', 'start_time': None},
+    ]
+    feed = ICalendarFeed()
+
+    body, etag = feed.render(('v1', (), None), events, '2023-10-01T00:00:00')
+    assert b'SUMMARY:A\\, B\r\n' in body
+    assert b'DTSTART;VALUE=DATE:20231102\r\n' in body
+    assert body.count(b'BEGIN:VEVENT') == 2 and b'TBA' not in body
+    assert feed.cached_etag(('v1', (), None)) == etag
+
+    changed = [events[0], {**events[1], 'title': 'PyCon 2023'}, events[2]]
+    changed_body, _ = feed.render(('v2', (), None), changed, '2023-10-02T00:00:00')
+    assert len(rendered) == 4
+    uids = [line for line in changed_body.split(b'\r\n') if line.startswith(b'UID:')]
+    assert uids == [line for line in body.split(b'\r\n') if line.startswith(b'UID:')]
+    assert all(len(line.encode()) <= 75 for line in fold('x' * 200).split('\r\n '))
+
+
+def test_icalendar_end_dates_are_exclusive():
+    conference = {'source': 'Python', 'id': '1', 'title': 'PyCon', 'start_time': '2023-11-02'}
+
+    def dates(**event):
+        lines = render_vevent({**conference, **event}, '20231001T000000Z').split('\r\n')
+        return [line for line in lines if line.startswith('DT') and 'STAMP' not in line]
+
+    assert dates(end_time='2023-11-04') == [
+        'DTSTART;VALUE=DATE:20231102', 'DTEND;VALUE=DATE:20231105']
+    assert dates(end_time='2023-11-04T18:00:00') == [
+        'DTSTART;VALUE=DATE:20231102', 'DTEND;VALUE=DATE:20231105']
+    assert dates(start_time='2023-11-02T09:00:00', end_time='2023-11-04') == [
+        'DTSTART:20231102T090000Z', 'DTEND:20231105T000000Z']
+
+
+def test_scraped_events_keep_their_uids_across_parses():
+    with open(os.path.join(MOCK_DIR, 'python.html'), encoding='utf-8') as f:
+        html = f.read()
+
+    def uids():
+        events = transform_events(('Python', PythonService().parse(html)))
+        return [event_uid(event) for event in events]
+
+    assert uids() == uids()
+
+
+def test_service_registry_selects_sources():
+    assert set(SERVICES) == set(Source)
+    assert Source.EVENTBRITE not in select_sources()
+    assert select_sources(['GCD', 'meetup', 'c2c_global']) == [
+        Source.MEETUP, Source.GCD, Source.C2CGLOBAL]
+    with pytest.raises(ValueError):
+        select_sources(['nope'])
+
+    assert SERVICES[Source.GCD].host == 'gdg.community.dev'
+    assert all(isinstance(getattr(services, spec.url), str) for spec in SERVICES.values())
+
+    fetchers = get_fetchers(1, [Source.MEETUP, Source.EVENTBRITE])
+    assert [source for source, _ in fetchers] == [Source.MEETUP, Source.EVENTBRITE]
+    assert fetchers[0][1].download.args == (1,)
+
+
+def test_fetch_sources_parses_on_pool(monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    html = """
+        <ul class="list-recent-events"><li>
+            <h3><a href="/events/pycon/">PyCon</a></h3>
+            <time datetime="2023-11-02T09:00:00+00:00">2 Nov.</time>
+        </li></ul>
+    """
+    fetcher = SplitFetcher(lambda: html, PythonService().parse)
+
+    results = fetch_sources([(Source.PYTHON, fetcher)], DataManager.new_snapshot())
+
+    assert [event['title'] for event in results.events[Source.PYTHON]] == ['PyCon']
+    assert DataManager.load_latest_data()['events'][0]['event_url'] == (
+        'https://www.python.org/events/pycon/')
+
+    # Unchanged payload, the archived parse is reused without the pool
+    monkeypatch.setattr('fetch.get_parse_pool', lambda: None)
+    cached = fetch_sources([(Source.PYTHON, fetcher)], DataManager.new_snapshot())
+    assert cached == results
+
+    monkeypatch.undo()
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    committed = DataManager.load_manifest()['sources']['Python']['date']
+    reparse([Source.MEETUP])
+    assert DataManager.load_manifest()['sources']['Python']['date'] == committed
+    reparse([Source.PYTHON])
+    assert DataManager.load_manifest()['sources']['Python']['date'] != committed
+    reparse()
+    assert [event['title'] for event in DataManager.load_latest_data()['events']] == ['PyCon']
+
+
+def test_failed_source_keeps_last_good_events(monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    DataManager.save_partition('old', Source.GCD.value, [{'title': 'GDG', 'source': 'GCD'}])
+
+    def broken():
+        raise ConnectionError('GDG is down')
+
+    results = fetch_sources(
+        [(Source.GCD, broken), (Source.PYTHON, lambda: [{'title': 'PyCon'}])],
+        DataManager.new_snapshot(),
+    )
+
+    assert list(results.failed) == [Source.GCD]
+    data = DataManager.load_latest_data()
+    assert sorted(event['title'] for event in data['events']) == ['GDG', 'PyCon']
+    assert data['stale_sources'] == [Source.GCD.value]
+    with open(tmp_path / DataManager.RUNS_FILE) as f:
+        assert [json.loads(line)['state'] for line in f] == ['failed', 'done']
+
+
+def test_costliest_sources_are_fetched_first(monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    order = []
+    fetchers = [
+        (source, lambda source=source: order.append(source) or [])
+        for source in [Source.PYTHON, Source.GCD, Source.MEETUP]
+    ]
+
+    fetch_sources(fetchers, DataManager.new_snapshot())
+
+    assert order == [Source.MEETUP, Source.GCD, Source.PYTHON]
+    assert SERVICES[Source.MEETUP].cost > SERVICES[Source.GCD].cost > SERVICES[Source.PYTHON].cost
+
+
+def die_once(marker):
+    if not os.path.exists(marker):
+        open(marker, 'w').close()
+        os._exit(1)
+    return [{'title': 'PyCon'}]
+
+
+def die(payload):
+    os._exit(1)
+
+
+def titled(payload):
+    return [{'title': payload}]
+
+
+def test_broken_parse_pool_is_replaced(monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    marker = str(tmp_path / 'died')
+
+    retried = fetch_sources(
+        [(Source.PYTHON, SplitFetcher(lambda: marker, die_once))], DataManager.new_snapshot())
+    assert [event['title'] for event in retried.events[Source.PYTHON]] == ['PyCon']
+
+    # Dies again on the retry, the pool is left broken for the next run
+    dead = fetch_sources([(Source.GCD, SplitFetcher(lambda: 'GDG', die))], 'dead')
+    assert list(dead.failed) == [Source.GCD]
+
+    healthy = fetch_sources([(Source.MEETUP, SplitFetcher(lambda: 'Meetup', titled))], 'next')
+    assert not healthy.failed
+    assert [event['title'] for event in healthy.events[Source.MEETUP]] == ['Meetup']
+
+
+@pytest.fixture
+def mock_upstream(monkeypatch):
+    upstream = MockUpstream(MOCK_DIR)
+    monkeypatch.setattr(MockHandler, 'upstream', upstream)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    for name in ('CONF_TECH_URL', 'GDG_URL', 'DEV_EVENTS_URL', 'EVENTYCO_URL'):
+        monkeypatch.setattr(services, name, services.upstream_url(getattr(services, name), base))
+    yield upstream
+    server.shutdown()
+
+
+def test_mock_upstream_serves_fixtures_over_http(mock_upstream):
+    with open(os.path.join(MOCK_DIR, 'conf_tech.json')) as f:
+        expected = jmespath.search('results[0].hits', json.load(f))
+
+    assert ConfTechService().fetch_events() == expected
+    assert len(GDGService().download()[0]['results']) > 0
+    assert mock_upstream.missing() == []
+
+    mock_upstream.profiles['29flvjv5x9-dsn.algolia.net'] = HostProfile(error_rate=1.0)
+    assert requests.post(services.CONF_TECH_URL).status_code == 503
+
+
+def test_mock_upstream_serves_pages_until_the_last(mock_upstream):
+    assert 'DevOpsDays' in requests.get(services.DEV_EVENTS_URL).text
+    assert 'PyData Berlin' in requests.get(services.DEV_EVENTS_URL + '?page=2').text
+    assert requests.get(services.DEV_EVENTS_URL + '?page=3').text == ''
+    assert 'RustConf' in requests.get(services.EVENTYCO_URL + '~2').text
+
+
+def test_paginated_scrapes_reuse_the_archived_parse(mock_upstream, monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    fetchers = [
+        (Source.DEV_EVENTS, split_fetcher(DevEventsService())),
+        (Source.EVENTYCO, split_fetcher(EventycoService())),
+    ]
+    results = fetch_sources(fetchers, DataManager.new_snapshot())
+
+    # Same pages, same scraped events, so the archived parse is reused without the pool
+    monkeypatch.setattr('fetch.get_parse_pool', lambda: None)
+    assert fetch_sources(fetchers, DataManager.new_snapshot()) == results
+
+
+def read_fixture(name):
+    with open(os.path.join(MOCK_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('service, pages', [
+    (DevEventsService, [read_fixture('dev_events.html'), read_fixture('dev_events~2.html'), '']),
+    # Past its last page Eventyco serves the last one again
+    (EventycoService, [read_fixture('eventyco.html')] + [read_fixture('eventyco~2.html')] * 2),
+    (RedisService, [REDIS_PAGE, '']),
+])
+def test_scrapers_stop_on_a_page_without_new_events(monkeypatch, service, pages):
+    requested = []
+
+    def page(url, *args, **kwargs):
+        requested.append(url)
+        assert len(requested) <= len(pages), 'paged past the last page'
+        return types.SimpleNamespace(text=pages[len(requested) - 1])
+
+    monkeypatch.setattr(requests, 'get', page)
+    monkeypatch.setattr(requests, 'post', page)
+
+    assert service().fetch_events()
+    assert len(requested) == len(pages)
+
+
+def test_scraper_pool_restores_clearance_cookies(monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    monkeypatch.setattr('services.cloudscraper.create_scraper', requests.Session)
+    scraper = ScraperPool().session('pr.tsmc.com')
+    scraper.headers['User-Agent'] = 'solver'
+    scraper.cookies.set('cf_clearance', 'ok', domain='pr.tsmc.com', expires=time.time() + 60)
+    scraper.cookies.set('__cf_bm', 'old', domain='pr.tsmc.com', expires=time.time() - 60)
+    ScraperPool().save('pr.tsmc.com', scraper)
+    assert (tmp_path / ScraperPool.COOKIES_FILE).exists()
+
+    restored = ScraperPool().session('pr.tsmc.com')
+
+    assert restored.headers['User-Agent'] == 'solver'
+    assert dict(restored.cookies) == {'cf_clearance': 'ok'}
+
+
+def test_meetup_planner_skips_redundant_locations():
+    usa, canada, austria = LOCATIONS[:3]
+    planner = MeetupCoveragePlanner({'runs': 1})
+    for _ in range(MeetupCoveragePlanner.HISTORY_SIZE):
+        planner.record(usa, requests_count=4, new_ids=120)
+        planner.record(canada, requests_count=2, new_ids=0)
+
+    assert planner.plan([usa, canada, austria]) == [austria, usa]
+
+    planner.state['runs'] = MeetupCoveragePlanner.FULL_SWEEP_EVERY
+    assert planner.plan([usa, canada, austria]) == [austria, usa, canada]
+
+
+def test_meetup_planner_updates_do_not_overwrite_each_other(monkeypatch, tmp_path):
+    monkeypatch.setattr(DataManager, 'DATA_DIRECTORY', str(tmp_path))
+    usa, canada = LOCATIONS[:2]
+    loaded = threading.Event()
+
+    def record_usa():
+        with MeetupCoveragePlanner.updating() as planner:
+            loaded.set()
+            time.sleep(0.2)
+            planner.record(usa, requests_count=4, new_ids=120)
+
+    thread = threading.Thread(target=record_usa)
+    thread.start()
+    loaded.wait()
+    with MeetupCoveragePlanner.updating() as planner:
+        planner.record(canada, requests_count=2, new_ids=0)
+    thread.join()
+
+    state = MeetupCoveragePlanner.load().state
+    assert state['runs'] == 2
+    assert sorted(state['locations']) == sorted([usa.name, canada.name])
+
+
+def test_bevy_client_fetches_every_page(monkeypatch):
+    events = [{'id': id, 'end_date': '2999-01-01T10:00:00+00:00'} for id in range(5)]
+    requested = []
+
+    def get(url, params, headers):
+        requested.append(params)
+        page = params['page']
+        results = events[(page - 1) * 2:page * 2]
+        return MockResponse({'count': 5, 'pagination': {'page_size': 2}, 'results': results})
+
+    monkeypatch.setattr(requests, 'get', get)
+
+    assert [event['id'] for event in GDGService().fetch_events()] == [0, 1, 2, 3, 4]
+    assert sorted(params['page'] for params in requested) == [1, 2, 3]
+    assert all(params['fields'] == ','.join(GDGService.PROJECTION) for params in requested)
+
+
+@pytest.mark.parametrize("service, mock_file, results", [
+    (ConfTechService, 'conf_tech.json', "results[0].hits"),
+    (GDGService, 'gdg.json', "results"),
+    (C2CGlobalService, 'c2c_global.json', "results"),
+])
+def test_projection_keeps_unified_fields(service, mock_file, results):
+    with open(os.path.join(MOCK_DIR, mock_file), 'r', encoding='utf-8') as f:
+        events = jmespath.search(results, json.load(f))
+    projected = [
+        {key: event[key] for key in service.PROJECTION if key in event} for event in events
+    ]
+
+    assert transform_events(('source', projected)) == transform_events(('source', events))
+    assert all(event['description'] for event in transform_events(('source', projected)))
+
+
+def test_datastax_pages_through_count(monkeypatch):
+    slugs = [f'event-{n}' for n in range(50)]
+    urls = set()
+
+    def get(url, params, headers):
+        urls.add(url)
+        results = [{'slug': slug} for slug in slugs[params['$start']:params['$end']]]
+        return MockResponse({'result': {'count': len(slugs), 'results': results}})
+
+    monkeypatch.setattr(requests, 'get', get)
+    DatastaxService.query_url.cache_clear()
+    events = DatastaxService().fetch_events()
+
+    assert [event['slug'] for event in events] == slugs
+    assert len(urls) == 1
+    assert DatastaxService.query_url.cache_info().misses == 1
+
+
 @pytest.mark.skip
 @pytest.mark.parametrize("service, method_name, methods_args", [
     (MeetupService(), "_fetch_page", (2, LOCATIONS[0], '')),
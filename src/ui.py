@@ -1,17 +1,27 @@
-import multiprocessing
-import os
-from datetime import datetime
-from typing import Final
+from collections.abc import Collection
+from datetime import datetime, timedelta
+from typing import Final, Optional
 
 import humanize
+import numpy as np
 import pandas as pd
 import pytz
 import streamlit as st
 
 from calendar_component import calendar
-from fetch import DataManager, Source, main
+from fetch import Source
+from search import SearchIndex
+from storage import DataManager
+from watch import DataWatcher
+from worker import ACTIVE_STATES, FetchWorker
 
-PID_FILE: Final = 'process_id.txt'
+STATUS_POLL_SECONDS: Final = 2
+# How often open sessions compare their data version with the watcher, in memory
+DATA_POLL_SECONDS: Final = 5
+CALENDAR_KEY: Final = 'events_calendar'
+# Events sent to the calendar around the visible range, so short navigation
+# and events overlapping the range edges render before the next report arrives.
+WINDOW_MARGIN: Final = timedelta(days=7)
 
 
 SOURCE_COLORS = {
@@ -44,6 +54,13 @@ SOURCE_COLORS = {
     Source.GITHUB: "#FF90A3",
     Source.SNOWFLAKE: "#FF6B8D",
 }
+# Last calendar source, for events of sources without a color above
+OTHER_SOURCE: Final = {'name': 'Other', 'color': "#8D99AE"}
+CALENDAR_SOURCES: Final = [
+    {'name': source.value, 'color': color} for source, color in SOURCE_COLORS.items()
+] + [OTHER_SOURCE]
+SOURCE_CODES: Final = {source.value: code for code, source in enumerate(SOURCE_COLORS)}
+OTHER_SOURCE_CODE: Final = len(SOURCE_COLORS)
 
 
 def app() -> None:
@@ -53,15 +70,13 @@ def app() -> None:
     delta_days = sidebar.number_input('Delta Days', min_value=1, value=3)
     fetch_button_clicked = sidebar.button('Fetch New Events')
 
-    if BackgroundProcessHandler.is_running():
-        sidebar.warning(
-            f'A background job is currently running with PID {BackgroundProcessHandler.get_pid()}.')
-    elif fetch_button_clicked:
-        multiprocessing.Process(
-            target=BackgroundProcessHandler.start, args=(main, (int(delta_days),)),
-        ).start()
-        sidebar.warning('A background job is currently running')
+    worker = get_fetch_worker()
+    if fetch_button_clicked:
+        worker.submit(int(delta_days))
+    with sidebar:
+        fetch_status_panel(worker)
 
+    query = sidebar.text_input('Search', placeholder='Kafka, Postgres...')
     min_going = sidebar.number_input('Filter by minimum Going', value=10)
     selected_sources = sidebar.multiselect(
         "Select sources:",
@@ -69,40 +84,67 @@ def app() -> None:
         default=[],
     )
 
-    event_manager = EventManager()
+    watcher = get_data_watcher()
+    event_manager = EventManager(watcher.version)
+    with sidebar:
+        data_version_check(watcher, event_manager.version)
     if event_manager.data:
-        df_events = event_manager.get_processed_data(selected_sources, min_going)
-        df_events = df_events.rename(
-            columns={
-                'end_time': 'end',
-                'start_time': 'start',
-                'event_url': 'url',
-            },
-        )
-        df_events = df_events[['start', 'url', 'title', 'end', 'source', 'going']]
-        events = df_events.to_dict('records')
-
-        for event in events:
-            color = SOURCE_COLORS[Source(event['source'])]
-            event['backgroundColor'] = color
-            event['borderColor'] = color
+        window_start, window_end = get_visible_window(st.session_state.get(CALENDAR_KEY))
+        df_events = event_manager.get_processed_data(
+            selected_sources, min_going, window=(window_start, window_end), query=query)
 
         last_data_date = datetime.fromisoformat(
             event_manager.data['date'] if event_manager.data else '')
         time_ago = humanize.naturaltime(datetime.now() - last_data_date)
         sidebar.text(f'Date: {time_ago} ({last_data_date.strftime("%Y-%m-%d %H:%M")})')
-        sidebar.text(f"{len(df_events)} Filtred events ({len(event_manager.data['events'])} Total)")
+        sidebar.text(f"{len(df_events)} Events in view ({len(event_manager.data['events'])} Total)")
+        stale_sources = event_manager.data.get('stale_sources')
+        if stale_sources:
+            sidebar.warning(
+                f"Last fetch failed for {', '.join(stale_sources)}, showing their last good events")
 
         calendar(
-            events=events,
+            events=calendar_events(df_events),
             options={"initialView": "listMonth", "height": 650},
-            key=(selected_sources, min_going)
+            key=CALENDAR_KEY,
+            sources=CALENDAR_SOURCES,
         )
 
 
+def calendar_events(df_events: pd.DataFrame) -> dict[str, list]:
+    # Columnar payload, the component expands rows and source colors on the client
+    return {
+        'id': df_events['id'].tolist(),
+        'start': df_events['start_time'].tolist(),
+        'end': df_events['end_time'].tolist(),
+        'title': df_events['title'].tolist(),
+        'url': df_events['event_url'].tolist(),
+        'going': df_events['going'].tolist(),
+        'source': df_events['source_code'].tolist(),
+    }
+
+
+def get_visible_window(component_value: Optional[dict]) -> tuple[pd.Timestamp, pd.Timestamp]:
+    """
+        Range reported by the calendar `datesSet` callback,
+        current month until the component reports one.
+    """
+    if component_value and component_value.get('start') and component_value.get('end'):
+        return _to_utc(component_value['start']), _to_utc(component_value['end'])
+
+    month_start = pd.Timestamp.now(tz='UTC').normalize().replace(day=1)
+    return month_start, month_start + pd.DateOffset(months=1)
+
+
+def _to_utc(value: str) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return ts.tz_convert('UTC') if ts.tzinfo else ts.tz_localize('UTC')
+
+
 class EventManager:
-    def __init__(self):
-        self.data = DataManager.load_latest_data()
+    def __init__(self, version: Optional[str] = None):
+        self.version = DataManager.data_version() if version is None else version
+        self.data = get_latest_data(self.version)
 
     @staticmethod
     def _custom_format(dt):
@@ -110,55 +152,238 @@ class EventManager:
             return ''
         return dt.isoformat()
 
-    def _transform_data(self, df_events):
+    @classmethod
+    def _transform_data(cls, df_events):
+        df_events['id'] = cls._event_ids(df_events)
+        df_events['source_code'] = df_events['source'].map(SOURCE_CODES).fillna(
+            OTHER_SOURCE_CODE).astype(int)
+
         df_events['going'] = pd.to_numeric(df_events['going'], errors='coerce', downcast='integer')
         df_events['going'] = df_events['going'].astype(
             object).where(df_events['going'].notna(), None)
 
-        df_events['start_time'] = pd.to_datetime(
-            df_events['start_time'], utc=True, infer_datetime_format=True, format='mixed')
-        df_events['end_time'] = pd.to_datetime(
-            df_events['end_time'], utc=True, infer_datetime_format=True, format='mixed')
+        # UTC timestamps are kept next to the formatted strings for range lookups
+        df_events['start_dt'] = pd.to_datetime(df_events['start_time'], utc=True, format='mixed')
+        df_events['end_dt'] = pd.to_datetime(df_events['end_time'], utc=True, format='mixed')
 
-        df_events['start_time'] = df_events['start_time'].dt.tz_convert(
-            pytz.timezone('EET')).apply(self._custom_format)
-        df_events['end_time'] = df_events['end_time'].dt.tz_convert(
-            pytz.timezone('EET')).apply(self._custom_format)
+        df_events['start_time'] = df_events['start_dt'].dt.tz_convert(
+            pytz.timezone('EET')).apply(cls._custom_format)
+        df_events['end_time'] = df_events['end_dt'].dt.tz_convert(
+            pytz.timezone('EET')).apply(cls._custom_format)
 
         return df_events
 
-    def get_processed_data(self, selected_sources, min_going):
+    @staticmethod
+    def _event_ids(df_events):
+        """
+            Calendar ids, unique within a snapshot and the same on every fetch, so the
+            calendar can be updated by diff. Events without ids fall back to their URL,
+            then to title and start time.
+        """
+        fallback = df_events['title'].astype(str) + '@' + df_events['start_time'].astype(str)
+        if 'event_url' in df_events:
+            fallback = df_events['event_url'].where(df_events['event_url'].notna(), fallback)
+        ids = df_events['source'] + ':' + df_events['id'].astype(str).where(
+            df_events['id'].notna(), fallback)
+        duplicates = ids.groupby(ids).cumcount()
+        return ids.where(duplicates == 0, ids + '#' + duplicates.astype(str))
+
+    def get_processed_data(self, selected_sources, min_going, window=None, query=''):
         if not self.data:
             return pd.DataFrame()
 
-        df_events = pd.DataFrame(self.data['events'])
-        df_events = self._transform_data(df_events)
+        index = get_event_index(self.data['date'], self.data['events'])
+        df_events = index.window(*(window or (None, None)), selected_sources, min_going)
 
-        if selected_sources:
-            df_events = df_events[df_events['source'].isin(selected_sources)]
-        df_events = df_events[df_events['going'].ge(min_going) | df_events['going'].isnull()]
+        if query:
+            df_events = df_events[df_events.index.isin(self.search(query))]
         return df_events
 
+    def search(self, query: str) -> set[int]:
+        matches = SearchIndex.search(self.data['date'], query)
+        if matches is None:
+            SearchIndex.build(self.data['date'], self.data['events'])
+            matches = SearchIndex.search(self.data['date'], query)
+        return matches or set()
 
-class BackgroundProcessHandler:
-    @classmethod
-    def start(cls, function, args):
-        with open(PID_FILE, 'w') as f:
-            f.write(str(os.getpid()))
 
-        try:
-            function(*args)
-        finally:
-            os.remove(PID_FILE)
+class SourcePartition:
+    """
+        Events of one source as positions in the start-sorted snapshot, so positions are
+        in start order too. The same events are also ordered by `going`: a minimum going
+        is a binary search there, or a scan of the visible range when that is shorter.
+    """
 
-    @classmethod
-    def is_running(cls):
-        return os.path.exists(PID_FILE)
+    def __init__(self, positions: np.ndarray, starts: pd.Series, going: np.ndarray):
+        self.positions = positions
+        self.starts = starts.iloc[positions].reset_index(drop=True)
+        self.going = going[positions]
 
-    @classmethod
-    def get_pid(cls):
-        with open(PID_FILE, 'r') as f:
-            return int(f.read())
+        known = np.flatnonzero(~np.isnan(self.going))
+        order = np.argsort(self.going[known], kind='stable')
+        self.going_sorted = self.going[known][order]
+        self.by_going = known[order]
+        # Events without a going count pass every minimum
+        self.unknown_going = np.flatnonzero(np.isnan(self.going))
+
+    def select(
+        self,
+        lower: Optional[pd.Timestamp],
+        upper: Optional[pd.Timestamp],
+        min_going: Optional[float],
+    ) -> np.ndarray:
+        lo, hi = 0, len(self.starts)
+        if lower is not None:
+            lo = self.starts.searchsorted(lower, side='left')
+        if upper is not None:
+            hi = self.starts.searchsorted(upper, side='right')
+        if min_going is None:
+            return self.positions[lo:hi]
+
+        first = np.searchsorted(self.going_sorted, min_going, side='left')
+        if hi - lo <= len(self.by_going) - first + len(self.unknown_going):
+            keep = ~(self.going[lo:hi] < min_going)
+            return self.positions[lo:hi][keep]
+
+        local = np.concatenate([self.by_going[first:], self.unknown_going])
+        local = np.sort(local[(local >= lo) & (local < hi)])
+        return self.positions[local]
+
+
+class EventIndex:
+    """
+        Snapshot events sorted by start time, partitioned by source.
+        A visible range lookup is a binary search in each selected partition, the
+        partitions are then merged back in start order, so a lookup costs about the
+        size of its result instead of the snapshot size.
+    """
+
+    def __init__(self, df_events: pd.DataFrame):
+        df_events = df_events.dropna(subset=['start_dt'])
+        # Index labels stay the event positions in the snapshot, the search index uses them
+        self.df_events = df_events.sort_values('start_dt', kind='stable')
+
+        starts = self.df_events['start_dt'].reset_index(drop=True)
+        going = pd.to_numeric(self.df_events['going'], errors='coerce').to_numpy(dtype=float)
+        sources = self.df_events['source'].to_numpy()
+        self.all_sources = SourcePartition(np.arange(len(starts)), starts, going)
+        self.partitions = {
+            source: SourcePartition(np.flatnonzero(sources == source), starts, going)
+            for source in pd.unique(sources)
+        }
+
+        # Events longer than the margin can start before the searched range and still
+        # overlap the visible one, there are few of them so they are checked directly.
+        span = self.df_events['end_dt'] - self.df_events['start_dt']
+        self.long_events = self.df_events[span > WINDOW_MARGIN]
+
+    def window(
+        self,
+        start: Optional[pd.Timestamp],
+        end: Optional[pd.Timestamp],
+        sources: Collection[str] = (),
+        min_going: Optional[float] = None,
+    ) -> pd.DataFrame:
+        lower = start - WINDOW_MARGIN if start is not None else None
+        upper = end + WINDOW_MARGIN if end is not None else None
+        partitions = [self.all_sources]
+        if sources:
+            partitions = [self.partitions[name] for name in sources if name in self.partitions]
+        # Each partition is in start order, a stable sort of the runs is their k-way merge
+        positions = np.sort(
+            np.concatenate([np.empty(0, dtype=np.intp)] + [
+                partition.select(lower, upper, min_going) for partition in partitions
+            ]),
+            kind='stable',
+        )
+
+        overlapping = self.long_events
+        if lower is not None:
+            overlapping = overlapping[
+                (overlapping['start_dt'] < lower) & (overlapping['end_dt'] >= lower)
+            ]
+        else:
+            overlapping = overlapping.iloc[:0]
+        if sources:
+            overlapping = overlapping[overlapping['source'].isin(sources)]
+        if min_going is not None:
+            overlapping = overlapping[~(overlapping['going'].astype(float) < min_going)]
+        return pd.concat([overlapping, self.df_events.iloc[positions]])
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_event_index(snapshot_date: str, _events: list[dict]) -> EventIndex:
+    return EventIndex(EventManager._transform_data(pd.DataFrame(_events)))
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_latest_data(version: str) -> dict:
+    """Data of one version, shared by every session until the version changes."""
+    return DataManager.load_latest_data()
+
+
+@st.cache_resource(show_spinner=False)
+def get_fetch_worker() -> FetchWorker:
+    return FetchWorker()
+
+
+@st.cache_resource(show_spinner=False)
+def get_data_watcher() -> DataWatcher:
+    return DataWatcher(on_change=invalidate_snapshot)
+
+
+def invalidate_snapshot(version: str) -> None:
+    # Frees the previous snapshot right away instead of at the next rerun
+    get_latest_data.clear()
+    get_event_index.clear()
+
+
+def data_version_check(watcher: DataWatcher, version: str) -> None:
+    """Reruns the session once the watcher reports data newer than the rendered one."""
+
+    @st.fragment(run_every=DATA_POLL_SECONDS)
+    def check():
+        if watcher.version != version:
+            st.rerun(scope='app')
+
+    check()
+
+
+def fetch_status_panel(worker: FetchWorker) -> None:
+    """
+        Job progress from the worker status file.
+        Polls while a job is active and reruns the app whenever a source is committed,
+        so fetched sources show up before the whole job finishes.
+    """
+    app_status = worker.status()
+    active = app_status.get('state') in ACTIVE_STATES
+    app_finished = count_finished(app_status)
+
+    @st.fragment(run_every=STATUS_POLL_SECONDS if active else None)
+    def panel():
+        status = worker.status()
+        state = status.get('state')
+        sources = status.get('sources', {})
+        finished = count_finished(status)
+
+        if active and (finished > app_finished or state not in ACTIVE_STATES):
+            st.rerun(scope='app')
+
+        if state in ACTIVE_STATES:
+            running = [name for name, source in sources.items() if source['state'] == 'running']
+            st.progress(
+                finished / len(sources) if sources else 0.0,
+                text=f"Fetching {', '.join(running) or '...'} ({finished}/{len(sources)})",
+            )
+        elif state in ('failed', 'stale'):
+            st.error(f"Last fetch job {state}: {status.get('error', 'worker stopped')}")
+
+    panel()
+
+
+def count_finished(status: dict) -> int:
+    sources = status.get('sources', {}).values()
+    return sum(source['state'] in ('done', 'failed') for source in sources)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,123 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Callable, Final, Optional
+
+from storage import DataManager
+
+# Data version checked this often when inotify is not available
+POLL_SECONDS: Final = 2
+# With inotify the version is still checked this often, in case an event was missed
+RECHECK_SECONDS: Final = 30
+
+# Subset of <sys/inotify.h>
+IN_CLOSE_WRITE: Final = 0x008
+IN_MOVED_TO: Final = 0x080
+IN_CREATE: Final = 0x100
+IN_DELETE: Final = 0x200
+IN_IGNORED: Final = 0x8000
+IN_CLOEXEC: Final = 0o2000000
+EVENT_HEADER: Final = struct.Struct('iIII')
+
+
+class DataWatcher:
+    """
+        Keeps `version` equal to `DataManager.data_version()` from a background thread,
+        so readers compare versions in memory instead of scanning the data directory.
+
+        On Linux the thread sleeps on inotify events of the data directory, snapshots,
+        manifests and data files all land there through a rename. Elsewhere, or when
+        inotify cannot be used, the version is polled every POLL_SECONDS.
+    """
+
+    def __init__(self, on_change: Optional[Callable[[str], None]] = None) -> None:
+        # Watched before the version is read, so no change falls in between
+        self._inotify = Inotify.create()
+        if self._inotify is not None:
+            self._inotify.watch(DataManager.DATA_DIRECTORY)
+        self.version = DataManager.data_version()
+        self._on_change = on_change
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='data-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        if self._inotify is not None:
+            self._inotify.close()
+
+    def _run(self) -> None:
+        mode = 'inotify' if self._inotify else 'polling'
+        logging.info(f"Watching {DataManager.DATA_DIRECTORY} for new data ({mode})")
+        while not self._stop.is_set():
+            if self._inotify is None or not self._inotify.watch(DataManager.DATA_DIRECTORY):
+                self._stop.wait(POLL_SECONDS)
+            else:
+                self._inotify.wait(RECHECK_SECONDS, self._stop)
+            self._check()
+
+    def _check(self) -> None:
+        version = DataManager.data_version()
+        if version == self.version:
+            return
+        self.version = version
+        logging.info(f"New data version: {version}")
+        if self._on_change:
+            self._on_change(version)
+
+
+class Inotify:
+    """Minimal inotify binding over libc, `create` returns None where it is unavailable."""
+    MASK: Final = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, libc: ctypes.CDLL, fd: int) -> None:
+        self._libc = libc
+        self._fd = fd
+        self._watched = False
+
+    @classmethod
+    def create(cls) -> Optional['Inotify']:
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            fd = libc.inotify_init1(IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        return cls(libc, fd) if fd >= 0 else None
+
+    def watch(self, directory: str) -> bool:
+        """Watches `directory` once it exists, it can be removed and created again."""
+        if not self._watched and os.path.isdir(directory):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+            self._watched = wd >= 0
+        return self._watched
+
+    def wait(self, timeout: float, stop: threading.Event) -> None:
+        """Returns after the next batch of events, after `timeout` or soon after `stop`."""
+        waited = 0.0
+        while waited < timeout and not stop.is_set():
+            ready, _, _ = select.select([self._fd], [], [], 1.0)
+            if ready:
+                self._drain()
+                return
+            waited += 1.0
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+    def _drain(self) -> None:
+        buffer = os.read(self._fd, 64 * 1024)
+        offset = 0
+        while offset < len(buffer):
+            _, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            if mask & IN_IGNORED:
+                # The directory was removed, watched again once it is back
+                self._watched = False
+            offset += EVENT_HEADER.size + length
@@ -0,0 +1,164 @@
+import atexit
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Final, Optional
+
+from fetch import main
+from storage import DataManager, write_json
+
+ACTIVE_STATES: Final = ('queued', 'running')
+
+
+class JobStatus:
+    """
+        State of the current fetch job, shared between the UI and the worker process
+        through a small JSON file that the sidebar can read on every rerun.
+    """
+    STATUS_FILE: Final = 'fetch_status.json'
+
+    @classmethod
+    def read(cls) -> dict[str, Any]:
+        try:
+            with open(cls._filename(), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @classmethod
+    def write(cls, status: dict[str, Any]) -> None:
+        write_json(cls._filename(), status)
+
+    @classmethod
+    def _filename(cls) -> str:
+        return os.path.join(DataManager.DATA_DIRECTORY, cls.STATUS_FILE)
+
+
+class FetchWorker:
+    """
+        Long-lived process running fetch jobs from a queue.
+
+        The worker is spawned once instead of forking the Streamlit server on every
+        click. Refresh requests made while a job is queued or running are joined to
+        that job, and a job whose process died is reported as "stale".
+    """
+
+    def __init__(self) -> None:
+        self._context = multiprocessing.get_context('spawn')
+        self._lock = threading.Lock()
+        self._queue: Any = None
+        self._process: Any = None
+        atexit.register(self.stop)
+
+    def submit(self, delta_days: int) -> str:
+        with self._lock:
+            status = self._status()
+            if status.get('state') in ACTIVE_STATES:
+                return status['job_id']
+
+            self._ensure_running()
+            job_id = uuid.uuid4().hex
+            JobStatus.write({
+                'job_id': job_id,
+                'state': 'queued',
+                'pid': self._process.pid,
+                'delta_days': delta_days,
+                'queued_at': datetime.now().isoformat(),
+                'sources': {},
+            })
+            self._queue.put((job_id, delta_days))
+            return job_id
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return self._status()
+
+    def stop(self) -> None:
+        if self._process is not None and self._process.is_alive():
+            self._queue.put(None)
+            self._process.join(timeout=1)
+            if self._process.is_alive():
+                self._process.terminate()
+
+    def _status(self) -> dict[str, Any]:
+        status = JobStatus.read()
+        if status.get('state') in ACTIVE_STATES and not self._is_alive(status.get('pid')):
+            logging.warning(f"Fetch job {status['job_id']} lost its worker {status.get('pid')}")
+            status['state'] = 'stale'
+            status['finished_at'] = datetime.now().isoformat()
+            JobStatus.write(status)
+        return status
+
+    def _ensure_running(self) -> None:
+        if self._process is not None and self._process.is_alive():
+            return
+        # A worker killed while reading could leave the old queue locked
+        self._queue = self._context.Queue()
+        self._process = self._context.Process(target=run_worker, args=(self._queue,))
+        self._process.start()
+
+    def _is_alive(self, pid: Optional[int]) -> bool:
+        if pid is None:
+            return False
+        if self._process is not None and pid == self._process.pid:
+            return self._process.is_alive()
+        return pid_exists(pid)
+
+
+def pid_exists(pid: int) -> bool:
+    if os.name == 'nt':
+        # Signal 0 would terminate the process on Windows, jobs of other processes are stale
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ProgressReporter:
+    def __init__(self, status: dict[str, Any]) -> None:
+        self.status = status
+
+    def __call__(self, source: str, state: str, count: int) -> None:
+        self.status['sources'][source] = {'state': state, 'events': count}
+        JobStatus.write(self.status)
+
+
+def run_worker(queue: Any) -> None:
+    while True:
+        job = queue.get()
+        if job is None:
+            return
+        job_id, delta_days = job
+
+        status = JobStatus.read()
+        status.update({
+            'job_id': job_id,
+            'state': 'running',
+            'pid': os.getpid(),
+            'started_at': datetime.now().isoformat(),
+        })
+        status.setdefault('sources', {})
+        JobStatus.write(status)
+
+        reporter = ProgressReporter(status)
+        try:
+            # A manual fetch refreshes every source, TTLs only gate the daemon
+            main(delta_days, progress=reporter, force=True)
+            status['state'] = 'done'
+        except Exception as exc:
+            logging.error(exc, exc_info=True)
+            for source_status in status['sources'].values():
+                if source_status['state'] == 'running':
+                    source_status['state'] = 'failed'
+            status['state'] = 'failed'
+            status['error'] = repr(exc)
+        status['finished_at'] = datetime.now().isoformat()
+        JobStatus.write(status)